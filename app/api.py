@@ -1,57 +1,99 @@
+import json
 from datetime import datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, EmailStr, validator
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .config import get_db
 from .models import AssignmentStatus
 from .repositories import AssignmentRepository, ChoreRepository, UserRepository
-from .security import ERROR_TYPES, InputValidator, SecureHTTPException
+from .security import InputValidator
 from .services import AssignmentService, ChoreService, UserService
 
+# Допустимые периодичности: кортеж для текста ошибки, frozenset для O(1) проверки
+_CADENCES = ("daily", "weekly", "monthly", "yearly", "once")
+_ALLOWED_CADENCES = frozenset(_CADENCES)
+
+
+# Общие тела валидаторов для Create/Update-моделей
+def _validate_name(v: str) -> str:
+    if not v or len(v.strip()) == 0:
+        raise ValueError("Name cannot be empty")
+    if len(v) > 100:
+        raise ValueError("Name too long (max 100 characters)")
+    return InputValidator.sanitize_string(v, 100)
+
+
+@lru_cache(maxsize=4096)
+def _email_is_valid(normalized: str) -> bool:
+    """Кэш проверки формата по нормализованному адресу: в реальном трафике
+    одни и те же адреса повторяются, повторный прогон regex не нужен.
+    Кэшируется результат, а не исключение — lru_cache исключения не хранит"""
+    return InputValidator.validate_email(normalized)
+
+
+def _validate_email(v: str) -> str:
+    normalized = v.lower().strip()
+    if not _email_is_valid(normalized):
+        raise ValueError("Invalid email format")
+    return normalized
+
+
+def _validate_title(v: str) -> str:
+    if not v or len(v.strip()) == 0:
+        raise ValueError("Title cannot be empty")
+    if len(v) > 200:
+        raise ValueError("Title too long (max 200 characters)")
+    return InputValidator.sanitize_string(v, 200)
+
+
+def _validate_cadence(v: str) -> str:
+    if not v or len(v.strip()) == 0:
+        raise ValueError("Cadence cannot be empty")
+    if len(v) > 50:
+        raise ValueError("Cadence too long (max 50 characters)")
+    if v.lower() not in _ALLOWED_CADENCES:
+        raise ValueError(f"Invalid cadence. Allowed values: {', '.join(_CADENCES)}")
+    return v.lower().strip()
+
+
+class BatchOperation(BaseModel):
+    method: str
+    path: str
+    body: Optional[dict] = None
+
 
 class UserCreate(BaseModel):
     name: str
     email: EmailStr
 
-    @validator("name")
+    @field_validator("name")
+    @classmethod
     def validate_name(cls, v):
-        if not v or len(v.strip()) == 0:
-            raise ValueError("Name cannot be empty")
-        if len(v) > 100:
-            raise ValueError("Name too long (max 100 characters)")
-        return InputValidator.sanitize_string(v, 100)
+        return _validate_name(v)
 
-    @validator("email")
+    @field_validator("email")
+    @classmethod
     def validate_email(cls, v):
-        if not InputValidator.validate_email(v):
-            raise ValueError("Invalid email format")
-        return v.lower().strip()
+        return _validate_email(v)
 
 
 class UserUpdate(BaseModel):
     name: Optional[str] = None
     email: Optional[EmailStr] = None
 
-    @validator("name")
+    @field_validator("name")
+    @classmethod
     def validate_name(cls, v):
-        if v is not None:
-            if len(v.strip()) == 0:
-                raise ValueError("Name cannot be empty")
-            if len(v) > 100:
-                raise ValueError("Name too long (max 100 characters)")
-            return InputValidator.sanitize_string(v, 100)
-        return v
-
-    @validator("email")
+        return _validate_name(v) if v is not None else v
+
+    @field_validator("email")
+    @classmethod
     def validate_email(cls, v):
-        if v is not None:
-            if not InputValidator.validate_email(v):
-                raise ValueError("Invalid email format")
-            return v.lower().strip()
-        return v
+        return _validate_email(v) if v is not None else v
 
 
 class UserResponse(BaseModel):
@@ -60,64 +102,37 @@ class UserResponse(BaseModel):
     email: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ChoreCreate(BaseModel):
     title: str
     cadence: str
 
-    @validator("title")
+    @field_validator("title")
+    @classmethod
     def validate_title(cls, v):
-        if not v or len(v.strip()) == 0:
-            raise ValueError("Title cannot be empty")
-        if len(v) > 200:
-            raise ValueError("Title too long (max 200 characters)")
-        return InputValidator.sanitize_string(v, 200)
+        return _validate_title(v)
 
-    @validator("cadence")
+    @field_validator("cadence")
+    @classmethod
     def validate_cadence(cls, v):
-        if not v or len(v.strip()) == 0:
-            raise ValueError("Cadence cannot be empty")
-        if len(v) > 50:
-            raise ValueError("Cadence too long (max 50 characters)")
-        allowed_cadences = ["daily", "weekly", "monthly", "yearly", "once"]
-        if v.lower() not in allowed_cadences:
-            raise ValueError(
-                f"Invalid cadence. Allowed values: {', '.join(allowed_cadences)}"
-            )
-        return v.lower().strip()
+        return _validate_cadence(v)
 
 
 class ChoreUpdate(BaseModel):
     title: Optional[str] = None
     cadence: Optional[str] = None
 
-    @validator("title")
+    @field_validator("title")
+    @classmethod
     def validate_title(cls, v):
-        if v is not None:
-            if len(v.strip()) == 0:
-                raise ValueError("Title cannot be empty")
-            if len(v) > 200:
-                raise ValueError("Title too long (max 200 characters)")
-            return InputValidator.sanitize_string(v, 200)
-        return v
-
-    @validator("cadence")
+        return _validate_title(v) if v is not None else v
+
+    @field_validator("cadence")
+    @classmethod
     def validate_cadence(cls, v):
-        if v is not None:
-            if len(v.strip()) == 0:
-                raise ValueError("Cadence cannot be empty")
-            if len(v) > 50:
-                raise ValueError("Cadence too long (max 50 characters)")
-            allowed_cadences = ["daily", "weekly", "monthly", "yearly", "once"]
-            if v.lower() not in allowed_cadences:
-                raise ValueError(
-                    f"Invalid cadence. Allowed values: {', '.join(allowed_cadences)}"
-                )
-            return v.lower().strip()
-        return v
+        return _validate_cadence(v) if v is not None else v
 
 
 class ChoreResponse(BaseModel):
@@ -126,8 +141,7 @@ class ChoreResponse(BaseModel):
     cadence: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AssignmentCreate(BaseModel):
@@ -149,21 +163,20 @@ class AssignmentResponse(BaseModel):
     created_at: datetime
     completed_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-def get_user_service(db: Session = Depends(get_db)) -> UserService:
+def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
     user_repo = UserRepository(db)
     return UserService(user_repo)
 
 
-def get_chore_service(db: Session = Depends(get_db)) -> ChoreService:
+def get_chore_service(db: AsyncSession = Depends(get_db)) -> ChoreService:
     chore_repo = ChoreRepository(db)
     return ChoreService(chore_repo)
 
 
-def get_assignment_service(db: Session = Depends(get_db)) -> AssignmentService:
+def get_assignment_service(db: AsyncSession = Depends(get_db)) -> AssignmentService:
     assignment_repo = AssignmentRepository(db)
     user_repo = UserRepository(db)
     chore_repo = ChoreRepository(db)
@@ -174,19 +187,19 @@ router = APIRouter()
 
 
 @router.get("/", tags=["Root"], summary="Корневой эндпоинт API")
-def root():
+async def root():
     """Корневой эндпоинт для проверки доступности API"""
     return {"message": "Chore Tracker API", "version": "0.1.0", "status": "ok"}
 
 
 @router.get("/health", tags=["Health"], summary="Проверка состояния API")
-def health():
+async def health():
     """Проверка работоспособности API"""
     return {"status": "ok"}
 
 
 @router.get("/healthz", tags=["Health"], summary="Проверка состояния API (healthz)")
-def healthz():
+async def healthz():
     """Проверка работоспособности API для health checks"""
     return {"status": "ok"}
 
@@ -194,7 +207,7 @@ def healthz():
 @router.get(
     "/statistics", tags=["Statistics"], summary="Получить статистику по назначениям"
 )
-def get_statistics(
+async def get_statistics(
     assignment_service: AssignmentService = Depends(get_assignment_service),
 ):
     """Получить статистику по всем назначениям:
@@ -202,172 +215,188 @@ def get_statistics(
     - завершенные
     - просроченные
     - процент выполнения"""
+    stats = await assignment_service.get_statistics()
+    return {"statistics": stats}
+
+
+# Заголовки исходного запроса, пробрасываемые во вложенные операции:
+# идентичность клиента для rate limiter и сквозной correlation ID
+_FORWARDED_HEADERS = frozenset((b"x-forwarded-for", b"x-correlation-id"))
+
+# Предел размера пакета: один запрос не должен разворачиваться в
+# неограниченное число полных циклов обработки
+MAX_BATCH_OPERATIONS = 50
+
+
+async def _dispatch(request: Request, method: str, path: str, body: Optional[dict]) -> dict:
+    """Прогоняет одну вложенную операцию через ASGI-приложение без сети"""
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(payload)).encode()),
+    ]
+    headers.extend(
+        (name, value)
+        for name, value in request.scope.get("headers", ())
+        if name in _FORWARDED_HEADERS
+    )
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method.upper(),
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        # Вложенные операции выполняются от имени реального клиента,
+        # а не синтетического "batch", чтобы лимиты считались честно
+        "client": request.scope.get("client") or ("batch", 0),
+        "server": request.scope.get("server") or ("batch", 80),
+    }
+
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    status_code = 500
+    chunks: List[bytes] = []
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await request.app(scope, receive, send)
+    raw = b"".join(chunks)
     try:
-        stats = assignment_service.get_statistics()
-        return {"statistics": stats}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        body_out = json.loads(raw) if raw else None
+    except json.JSONDecodeError:
+        # Вложенный эндпоинт может вернуть не-JSON (например HTML /docs);
+        # такой ответ не должен ронять весь пакет через обработчик ValueError
+        body_out = raw.decode("utf-8", errors="replace")
+    return {"status_code": status_code, "body": body_out}
+
+
+@router.post("/batch", tags=["Batch"], summary="Пакетное выполнение операций")
+async def batch(operations: List[BatchOperation], request: Request) -> List[Any]:
+    """Выполняет список операций за один HTTP-запрос: экономит round-trip
+    на каждую вложенную операцию при массовом создании сущностей"""
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(
+            f"Too many operations in batch (max {MAX_BATCH_OPERATIONS})"
+        )
+
+    results = []
+    for op in operations:
+        results.append(await _dispatch(request, op.method, op.path, op.body))
+    return results
 
 
 @router.get("/users", response_model=List[UserResponse], tags=["Users"])
-def get_users(user_service: UserService = Depends(get_user_service)):
-    try:
-        users = user_service.get_all_users()
-        return users
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_users(user_service: UserService = Depends(get_user_service)):
+    return await user_service.get_all_users()
 
 
 @router.get("/users/{user_id}", response_model=UserResponse, tags=["Users"])
-def get_user(user_id: int, user_service: UserService = Depends(get_user_service)):
-    try:
-        user = user_service.get_user(user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_user(user_id: int, user_service: UserService = Depends(get_user_service)):
+    user = await user_service.get_user(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 
 @router.post("/users", response_model=UserResponse, tags=["Users"])
-def create_user(
+async def create_user(
     user_data: UserCreate, user_service: UserService = Depends(get_user_service)
 ):
-    try:
-        user = user_service.create_user(user_data.name, user_data.email)
-        return user
-    except ValueError as e:
-        raise SecureHTTPException(
-            error_type=ERROR_TYPES["validation_error"],
-            title="Validation Error",
-            detail=str(e),
-            status_code=400,
-        )
-    except Exception:
-        raise SecureHTTPException(
-            error_type=ERROR_TYPES["internal_error"],
-            title="Internal Server Error",
-            detail="Failed to create user",
-            status_code=500,
-        )
+    return await user_service.create_user(user_data.name, user_data.email)
 
 
 @router.put("/users/{user_id}", response_model=UserResponse, tags=["Users"])
-def update_user(
+async def update_user(
     user_id: int,
     user_data: UserUpdate,
     user_service: UserService = Depends(get_user_service),
 ):
-    try:
-        user = user_service.update_user(user_id, user_data.name, user_data.email)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    user = await user_service.update_user(user_id, user_data.name, user_data.email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 
 @router.delete("/users/{user_id}", tags=["Users"])
-def delete_user(user_id: int, user_service: UserService = Depends(get_user_service)):
-    try:
-        success = user_service.delete_user(user_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="User not found")
-        return {"message": "User deleted successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def delete_user(
+    user_id: int, user_service: UserService = Depends(get_user_service)
+):
+    success = await user_service.delete_user(user_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"message": "User deleted successfully"}
 
 
 @router.get("/chores", response_model=List[ChoreResponse], tags=["Chores"])
-def get_chores(chore_service: ChoreService = Depends(get_chore_service)):
-    try:
-        chores = chore_service.get_all_chores()
-        return chores
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_chores(chore_service: ChoreService = Depends(get_chore_service)):
+    return await chore_service.get_all_chores()
 
 
 @router.get("/chores/{chore_id}", response_model=ChoreResponse, tags=["Chores"])
-def get_chore(chore_id: int, chore_service: ChoreService = Depends(get_chore_service)):
-    try:
-        chore = chore_service.get_chore(chore_id)
-        if not chore:
-            raise HTTPException(status_code=404, detail="Chore not found")
-        return chore
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_chore(
+    chore_id: int, chore_service: ChoreService = Depends(get_chore_service)
+):
+    chore = await chore_service.get_chore(chore_id)
+    if not chore:
+        raise HTTPException(status_code=404, detail="Chore not found")
+    return chore
 
 
 @router.post("/chores", response_model=ChoreResponse, tags=["Chores"])
-def create_chore(
+async def create_chore(
     chore_data: ChoreCreate, chore_service: ChoreService = Depends(get_chore_service)
 ):
-    try:
-        chore = chore_service.create_chore(chore_data.title, chore_data.cadence)
-        return chore
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await chore_service.create_chore(chore_data.title, chore_data.cadence)
 
 
 @router.put("/chores/{chore_id}", response_model=ChoreResponse, tags=["Chores"])
-def update_chore(
+async def update_chore(
     chore_id: int,
     chore_data: ChoreUpdate,
     chore_service: ChoreService = Depends(get_chore_service),
 ):
-    try:
-        chore = chore_service.update_chore(
-            chore_id, chore_data.title, chore_data.cadence
-        )
-        if not chore:
-            raise HTTPException(status_code=404, detail="Chore not found")
-        return chore
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    chore = await chore_service.update_chore(
+        chore_id, chore_data.title, chore_data.cadence
+    )
+    if not chore:
+        raise HTTPException(status_code=404, detail="Chore not found")
+    return chore
 
 
 @router.delete("/chores/{chore_id}", tags=["Chores"])
-def delete_chore(
+async def delete_chore(
     chore_id: int, chore_service: ChoreService = Depends(get_chore_service)
 ):
-    try:
-        success = chore_service.delete_chore(chore_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Chore not found")
-        return {"message": "Chore deleted successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    success = await chore_service.delete_chore(chore_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Chore not found")
+    return {"message": "Chore deleted successfully"}
 
 
 @router.get(
     "/assignments", response_model=List[AssignmentResponse], tags=["Assignments"]
 )
-def get_assignments(
+async def get_assignments(
     assignment_service: AssignmentService = Depends(get_assignment_service),
 ):
-    try:
-        assignments = assignment_service.get_all_assignments()
-        return assignments
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await assignment_service.get_all_assignments()
 
 
 @router.get(
@@ -375,35 +404,24 @@ def get_assignments(
     response_model=AssignmentResponse,
     tags=["Assignments"],
 )
-def get_assignment(
+async def get_assignment(
     assignment_id: int,
     assignment_service: AssignmentService = Depends(get_assignment_service),
 ):
-    try:
-        assignment = assignment_service.get_assignment(assignment_id)
-        if not assignment:
-            raise HTTPException(status_code=404, detail="Assignment not found")
-        return assignment
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    assignment = await assignment_service.get_assignment(assignment_id)
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    return assignment
 
 
 @router.post("/assignments", response_model=AssignmentResponse, tags=["Assignments"])
-def create_assignment(
+async def create_assignment(
     assignment_data: AssignmentCreate,
     assignment_service: AssignmentService = Depends(get_assignment_service),
 ):
-    try:
-        assignment = assignment_service.create_assignment(
-            assignment_data.user_id, assignment_data.chore_id, assignment_data.due_at
-        )
-        return assignment
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await assignment_service.create_assignment(
+        assignment_data.user_id, assignment_data.chore_id, assignment_data.due_at
+    )
 
 
 @router.put(
@@ -411,35 +429,25 @@ def create_assignment(
     response_model=AssignmentResponse,
     tags=["Assignments"],
 )
-def update_assignment(
+async def update_assignment(
     assignment_id: int,
     assignment_data: AssignmentUpdate,
     assignment_service: AssignmentService = Depends(get_assignment_service),
 ):
-    try:
-        assignment = assignment_service.update_assignment_status(
-            assignment_id, assignment_data.status
-        )
-        if not assignment:
-            raise HTTPException(status_code=404, detail="Assignment not found")
-        return assignment
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    assignment = await assignment_service.update_assignment_status(
+        assignment_id, assignment_data.status
+    )
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    return assignment
 
 
 @router.delete("/assignments/{assignment_id}", tags=["Assignments"])
-def delete_assignment(
+async def delete_assignment(
     assignment_id: int,
     assignment_service: AssignmentService = Depends(get_assignment_service),
 ):
-    try:
-        success = assignment_service.delete_assignment(assignment_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Assignment not found")
-        return {"message": "Assignment deleted successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    success = await assignment_service.delete_assignment(assignment_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    return {"message": "Assignment deleted successfully"}
@@ -0,0 +1,48 @@
+import time
+from typing import Any, Optional
+
+
+class TTLCache:
+    """Простой in-memory кэш с TTL и ограничением размера"""
+
+    __slots__ = ("ttl", "maxsize", "_store")
+
+    def __init__(self, ttl: float = 30.0, maxsize: int = 1024):
+        """
+        Args:
+            ttl: Время жизни записи в секундах
+            maxsize: Максимальное количество записей (защита от роста памяти)
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._store: dict = {}
+
+    def get(self, key) -> Optional[Any]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._store.pop(key, None)
+            return None
+
+        return value
+
+    def set(self, key, value) -> None:
+        if len(self._store) >= self.maxsize and key not in self._store:
+            # Вытесняем самую старую запись (dict сохраняет порядок вставки)
+            self._store.pop(next(iter(self._store)))
+
+        self._store[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key) -> None:
+        self._store.pop(key, None)
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+# Кэши горячих одиночных GET-ов; инвалидируются сервисами при изменениях
+user_cache = TTLCache(ttl=30.0)
+chore_cache = TTLCache(ttl=30.0)
@@ -1,28 +1,66 @@
 import os
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .models import Base
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./chore_tracker.db")
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./chore_tracker.db")
+
+# Включает raiseload("*") в списочных запросах, чтобы ловить случайные ленивые загрузки
+DEBUG_RAISELOAD = os.getenv("RAISELOAD") == "1"
+
+# Приводим sqlite URL к асинхронному драйверу, если он указан без него
+if DATABASE_URL.startswith("sqlite://"):
+    DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=os.getenv("SQL_ECHO", "0") == "1",
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=10,
+    max_overflow=20,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    query_cache_size=1200,
+)
+
+# PRAGMA-настройки SQLite: WAL и ослабленный sync резко снижают стоимость
+# записи, увеличенный кэш держит страницы горячими между запросами
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    # Ожидание вместо немедленного "database is locked" при конкурентных
+    # подключениях (несколько воркеров над одним файлом)
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
 
-connect_args = {}
 if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
 
-engine = create_engine(DATABASE_URL, echo=True, connect_args=connect_args)
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(autoflush=False, bind=engine, expire_on_commit=False)
 
 
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    # Один commit на запрос: репозитории делают только flush,
+    # транзакция фиксируется при завершении зависимости
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+        await db.commit()
@@ -1,9 +1,10 @@
-import uuid
+import os
+from collections import deque
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from .api import router
 from .config import create_tables
@@ -20,6 +21,7 @@ app = FastAPI(
     title="Chore Tracker API",
     description="API для управления пользователями, задачами и назначениями между участниками",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
@@ -53,10 +55,36 @@ class ApiError(Exception):
         self.status = status
 
 
+# Пул correlation ID: один системный вызов os.urandom на 1024 идентификатора
+# вместо чтения энтропии и форматирования uuid на каждый запрос
+_UUID_POOL_SIZE = 1024
+_UUID_POOL: deque = deque()
+
+
+def _refill_uuid_pool() -> None:
+    buf = os.urandom(16 * _UUID_POOL_SIZE)
+    append = _UUID_POOL.append
+    for i in range(0, 16 * _UUID_POOL_SIZE, 16):
+        b = buf[i : i + 16]
+        # Формат UUID (36 символов, 4 дефиса) сохраняется для совместимости
+        # с клиентами, разбирающими заголовок как uuid
+        append(
+            f"{b[:4].hex()}-{b[4:6].hex()}-{b[6:8].hex()}"
+            f"-{b[8:10].hex()}-{b[10:].hex()}"
+        )
+
+
+def _new_correlation_id() -> str:
+    """Генерация correlation ID из предварительно заготовленного пула"""
+    if not _UUID_POOL:
+        _refill_uuid_pool()
+    return _UUID_POOL.popleft()
+
+
 @app.middleware("http")
 async def add_correlation_id(request: Request, call_next):
     """Middleware для добавления correlation ID к каждому запросу"""
-    correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
+    correlation_id = request.headers.get("X-Correlation-ID") or _new_correlation_id()
     response = await call_next(request)
     response.headers["X-Correlation-ID"] = correlation_id
     return response
@@ -78,6 +106,23 @@ async def api_error_handler(request: Request, exc: ApiError):
     )
 
 
+@app.exception_handler(ValueError)
+async def value_error_handler(request: Request, exc: ValueError):
+    """Бизнес-ошибки доменного слоя транслируются в 400 без try/except в роутах"""
+    error_response = create_error_response(
+        request=request,
+        error_type=ERROR_TYPES["validation_error"],
+        title="Validation Error",
+        detail=str(exc),
+        status_code=400,
+    )
+    return JSONResponse(
+        status_code=error_response["status_code"],
+        content=error_response["content"],
+        headers=error_response["headers"],
+    )
+
+
 @app.exception_handler(SecureHTTPException)
 async def secure_http_exception_handler(request: Request, exc: SecureHTTPException):
     error_response = create_error_response(
@@ -145,7 +190,7 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 @app.on_event("startup")
 async def startup_event():
-    create_tables()
+    await create_tables()
     setup_security_logging()
 
 
@@ -1,31 +1,43 @@
 import enum
-from datetime import datetime
+from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
+_UTC = timezone.utc
+
+
+def utcnow() -> datetime:
+    """Наивный момент UTC: общий helper для всех слоёв
+    (datetime.utcnow устарел в Python 3.12)"""
+    return datetime.now(_UTC).replace(tzinfo=None)
+
+
 Base = declarative_base()
 
 
 class User(Base):
     __tablename__ = "users"
+    # Серверные default-значения возвращаются через RETURNING в том же INSERT
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
     assignments = relationship("Assignment", back_populates="user")
 
 
 class Chore(Base):
     __tablename__ = "chores"
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     cadence = Column(String(50), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
     assignments = relationship("Assignment", back_populates="chore")
 
@@ -39,13 +51,23 @@ class AssignmentStatus(str, enum.Enum):
 
 class Assignment(Base):
     __tablename__ = "assignments"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Составной индекс покрывает фильтр get_overdue (due_at < now AND status != ...)
+        Index("ix_assignments_due_status", "due_at", "status"),
+        # Отдельный индекс по статусу: составной (due_at, status) не
+        # покрывает выборки только по статусу
+        Index("ix_assignments_status", "status"),
+        Index("ix_assignments_user_id", "user_id"),
+        Index("ix_assignments_chore_id", "chore_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     chore_id = Column(Integer, ForeignKey("chores.id"), nullable=False)
     due_at = Column(DateTime, nullable=False)
     status = Column(Enum(AssignmentStatus), default=AssignmentStatus.PENDING)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     completed_at = Column(DateTime, nullable=True)
 
     user = relationship("User", back_populates="assignments")
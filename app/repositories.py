@@ -1,163 +1,240 @@
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import and_, select
-from sqlalchemy.orm import Session
-
-from .models import Assignment, AssignmentStatus, Chore, User
+from sqlalchemy import and_, case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
+
+from .config import DEBUG_RAISELOAD
+from .models import Assignment, AssignmentStatus, Chore, User, utcnow
+
+# В режиме отладки любой непредусмотренный lazy load падает с ошибкой,
+# чтобы N+1-регрессии не проходили CI незамеченными
+_raiseload_opts = (raiseload("*"),) if DEBUG_RAISELOAD else ()
+
+# Базовые select-конструкции собираются один раз на модуль;
+# на месте вызова остаётся только .where(...)
+_USER_SELECT = select(User)
+_USER_LIST_SELECT = _USER_SELECT.options(*_raiseload_opts)
+_CHORE_SELECT = select(Chore)
+_CHORE_LIST_SELECT = _CHORE_SELECT.options(*_raiseload_opts)
+_ASSIGNMENT_SELECT = select(Assignment).options(
+    selectinload(Assignment.user),
+    selectinload(Assignment.chore),
+    *_raiseload_opts,
+)
 
 
 class UserRepository:
-    def __init__(self, session: Session):
+    __slots__ = ("session",)
+
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create(self, name: str, email: str) -> User:
+    async def create(self, name: str, email: str) -> User:
         user = User(name=name, email=email)
         self.session.add(user)
-        self.session.commit()
-        self.session.refresh(user)
+        await self.session.flush()
         return user
 
-    def get_by_id(self, user_id: int) -> Optional[User]:
-        return self.session.get(User, user_id)
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        return await self.session.get(User, user_id)
 
-    def get_by_email(self, email: str) -> Optional[User]:
-        stmt = select(User).where(User.email == email)
-        return self.session.execute(stmt).scalar_one_or_none()
+    async def get_by_email(self, email: str) -> Optional[User]:
+        stmt = _USER_SELECT.where(User.email == email)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
 
-    def get_all(self) -> List[User]:
-        stmt = select(User)
-        return list(self.session.execute(stmt).scalars().all())
+    async def get_all(self) -> List[User]:
+        stmt = _USER_LIST_SELECT
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
 
-    def update(
+    async def update(
         self, user_id: int, name: str = None, email: str = None
     ) -> Optional[User]:
-        user = self.get_by_id(user_id)
-        if not user:
-            return None
-
-        if name is not None:
-            user.name = name
-        if email is not None:
-            user.email = email
-
-        self.session.commit()
-        self.session.refresh(user)
-        return user
-
-    def delete(self, user_id: int) -> bool:
-        user = self.get_by_id(user_id)
-        if not user:
-            return False
+        values = {
+            key: value
+            for key, value in (("name", name), ("email", email))
+            if value is not None
+        }
+        if not values:
+            return await self.get_by_id(user_id)
+
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(**values)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
 
-        self.session.delete(user)
-        self.session.commit()
-        return True
+    async def delete(self, user_id: int) -> bool:
+        result = await self.session.execute(delete(User).where(User.id == user_id))
+        return result.rowcount > 0
 
 
 class ChoreRepository:
-    def __init__(self, session: Session):
+    __slots__ = ("session",)
+
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create(self, title: str, cadence: str) -> Chore:
+    async def create(self, title: str, cadence: str) -> Chore:
         chore = Chore(title=title, cadence=cadence)
         self.session.add(chore)
-        self.session.commit()
-        self.session.refresh(chore)
+        await self.session.flush()
         return chore
 
-    def get_by_id(self, chore_id: int) -> Optional[Chore]:
-        return self.session.get(Chore, chore_id)
+    async def get_by_id(self, chore_id: int) -> Optional[Chore]:
+        return await self.session.get(Chore, chore_id)
 
-    def get_all(self) -> List[Chore]:
-        stmt = select(Chore)
-        return list(self.session.execute(stmt).scalars().all())
+    async def get_all(self) -> List[Chore]:
+        stmt = _CHORE_LIST_SELECT
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
 
-    def update(
+    async def update(
         self, chore_id: int, title: str = None, cadence: str = None
     ) -> Optional[Chore]:
-        chore = self.get_by_id(chore_id)
-        if not chore:
-            return None
-
-        if title is not None:
-            chore.title = title
-        if cadence is not None:
-            chore.cadence = cadence
-
-        self.session.commit()
-        self.session.refresh(chore)
-        return chore
-
-    def delete(self, chore_id: int) -> bool:
-        chore = self.get_by_id(chore_id)
-        if not chore:
-            return False
+        values = {
+            key: value
+            for key, value in (("title", title), ("cadence", cadence))
+            if value is not None
+        }
+        if not values:
+            return await self.get_by_id(chore_id)
+
+        stmt = (
+            update(Chore)
+            .where(Chore.id == chore_id)
+            .values(**values)
+            .returning(Chore)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
 
-        self.session.delete(chore)
-        self.session.commit()
-        return True
+    async def delete(self, chore_id: int) -> bool:
+        result = await self.session.execute(delete(Chore).where(Chore.id == chore_id))
+        return result.rowcount > 0
 
 
 class AssignmentRepository:
-    def __init__(self, session: Session):
+    __slots__ = ("session",)
+
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create(self, user_id: int, chore_id: int, due_at: datetime) -> Assignment:
+    async def create(
+        self, user_id: int, chore_id: int, due_at: datetime
+    ) -> Assignment:
         assignment = Assignment(user_id=user_id, chore_id=chore_id, due_at=due_at)
         self.session.add(assignment)
-        self.session.commit()
-        self.session.refresh(assignment)
+        await self.session.flush()
         return assignment
 
-    def get_by_id(self, assignment_id: int) -> Optional[Assignment]:
-        return self.session.get(Assignment, assignment_id)
-
-    def get_all(self) -> List[Assignment]:
-        stmt = select(Assignment)
-        return list(self.session.execute(stmt).scalars().all())
-
-    def get_by_user(self, user_id: int) -> List[Assignment]:
-        stmt = select(Assignment).where(Assignment.user_id == user_id)
-        return list(self.session.execute(stmt).scalars().all())
-
-    def get_by_chore(self, chore_id: int) -> List[Assignment]:
-        stmt = select(Assignment).where(Assignment.chore_id == chore_id)
-        return list(self.session.execute(stmt).scalars().all())
+    async def get_by_id(self, assignment_id: int) -> Optional[Assignment]:
+        return await self.session.get(Assignment, assignment_id)
 
-    def get_by_status(self, status: AssignmentStatus) -> List[Assignment]:
-        stmt = select(Assignment).where(Assignment.status == status)
-        return list(self.session.execute(stmt).scalars().all())
-
-    def get_overdue(self) -> List[Assignment]:
-        now = datetime.utcnow()
-        stmt = select(Assignment).where(
+    async def exists_user_and_chore(
+        self, user_id: int, chore_id: int
+    ) -> tuple[bool, bool]:
+        """Проверяет существование пользователя и задачи одним запросом"""
+        stmt = select(
+            select(User.id).where(User.id == user_id).exists(),
+            select(Chore.id).where(Chore.id == chore_id).exists(),
+        )
+        result = await self.session.execute(stmt)
+        user_exists, chore_exists = result.one()
+        return bool(user_exists), bool(chore_exists)
+
+    async def get_all(self) -> List[Assignment]:
+        stmt = _ASSIGNMENT_SELECT
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def get_by_user(self, user_id: int) -> List[Assignment]:
+        stmt = _ASSIGNMENT_SELECT.where(Assignment.user_id == user_id)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def get_by_chore(self, chore_id: int) -> List[Assignment]:
+        stmt = _ASSIGNMENT_SELECT.where(Assignment.chore_id == chore_id)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def get_by_status(self, status: AssignmentStatus) -> List[Assignment]:
+        stmt = _ASSIGNMENT_SELECT.where(Assignment.status == status)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def get_overdue(self) -> List[Assignment]:
+        now = utcnow()
+        stmt = _ASSIGNMENT_SELECT.where(
             and_(
-                Assignment.due_at < now, Assignment.status != AssignmentStatus.COMPLETED
+                Assignment.due_at < now,
+                Assignment.status != AssignmentStatus.COMPLETED,
             )
         )
-        return list(self.session.execute(stmt).scalars().all())
-
-    def update_status(
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def get_statistics(self) -> dict:
+        """Агрегирует счётчики по назначениям одним SQL-запросом"""
+        now = utcnow()
+        stmt = select(
+            func.count().label("total"),
+            func.sum(
+                case((Assignment.status == AssignmentStatus.COMPLETED, 1), else_=0)
+            ).label("completed"),
+            func.sum(
+                case((Assignment.status == AssignmentStatus.PENDING, 1), else_=0)
+            ).label("pending"),
+            func.sum(
+                case(
+                    (
+                        and_(
+                            Assignment.due_at < now,
+                            Assignment.status != AssignmentStatus.COMPLETED,
+                        ),
+                        1,
+                    ),
+                    else_=0,
+                )
+            ).label("overdue"),
+        ).select_from(Assignment)
+        result = await self.session.execute(stmt)
+        row = result.one()
+        return {
+            "total": row.total or 0,
+            "completed": row.completed or 0,
+            "pending": row.pending or 0,
+            "overdue": row.overdue or 0,
+        }
+
+    async def update_status(
         self, assignment_id: int, status: AssignmentStatus
     ) -> Optional[Assignment]:
-        assignment = self.get_by_id(assignment_id)
-        if not assignment:
-            return None
-
-        assignment.status = status
+        values = {"status": status}
         if status == AssignmentStatus.COMPLETED:
-            assignment.completed_at = datetime.utcnow()
-
-        self.session.commit()
-        self.session.refresh(assignment)
-        return assignment
-
-    def delete(self, assignment_id: int) -> bool:
-        assignment = self.get_by_id(assignment_id)
-        if not assignment:
-            return False
+            # Отметка о завершении ставится на стороне БД в том же UPDATE
+            values["completed_at"] = func.now()
+
+        stmt = (
+            update(Assignment)
+            .where(Assignment.id == assignment_id)
+            .values(**values)
+            .returning(Assignment)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
 
-        self.session.delete(assignment)
-        self.session.commit()
-        return True
+    async def delete(self, assignment_id: int) -> bool:
+        result = await self.session.execute(
+            delete(Assignment).where(Assignment.id == assignment_id)
+        )
+        return result.rowcount > 0
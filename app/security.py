@@ -1,14 +1,85 @@
+import functools
 import logging
 import os
 import re
 import time
 import uuid
-from collections import defaultdict
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import PurePosixPath
 from typing import Optional
 
 from fastapi.responses import JSONResponse
 
+_UTC = timezone.utc
+
+# Локальная привязка конструктора: убирает LOAD_ATTR на модуль uuid в
+# каждом вызове горячего пути
+_uuid4 = uuid.uuid4
+
+__all__ = [
+    "SecureHTTPException",
+    "InputValidator",
+    "SecretMaskingFilter",
+    "SecretsManager",
+    "SecurityHeadersMiddleware",
+    "RateLimiter",
+    "RateLimitMiddleware",
+    "ERROR_TYPES",
+    "create_error_response",
+    "setup_security_logging",
+]
+
+# Для санитизации пользовательского ввода предпочитаем re2 (DFA, линейное
+# время без катастрофического backtracking на злонамеренных строках вида
+# "<a><a><a>..."); при отсутствии пакета откатываемся на стандартный re
+try:
+    import re2 as _sanitize_re
+except ImportError:
+    _sanitize_re = re
+
+# Шаблоны компилируются один раз на модуль: кэш re маленький (и сбрасывается
+# при переполнении), а санитизация и маскирование стоят на горячем пути
+_EMAIL_RE = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
+_TAG_BLOCK_RE = _sanitize_re.compile(r"<[^>]*>.*?</[^>]*>", _sanitize_re.DOTALL)
+_TAG_RE = _sanitize_re.compile(r"<[^>]+>")
+
+# Все JS/SQL-шаблоны слиты в одну альтернацию: один проход движка по строке
+# и одна аллокация результата вместо ~17 последовательных re.sub
+_FUSED_DANGEROUS_RE = _sanitize_re.compile(
+    "|".join(
+        (
+            r"javascript:",
+            r"alert\s*\(",
+            r"eval\s*\(",
+            r"exec\s*\(",
+            r"document\.",
+            r"window\.",
+            r"on\w+\s*=",
+            r"DROP\s+TABLE",
+            r"DELETE\s+FROM",
+            r"INSERT\s+INTO",
+            r"UPDATE\s+SET",
+            r"SELECT\s+.*\s+FROM",
+            r"UNION\s+SELECT",
+            r"OR\s+1\s*=\s*1",
+            r"AND\s+1\s*=\s*1",
+            r";\s*--",
+            r"/\*.*?\*/",
+        )
+    ),
+    _sanitize_re.IGNORECASE,
+)
+
+# Остаточные опасные символы срезаются одним проходом translate вместо
+# пяти последовательных str.replace
+_STRIP_TABLE = str.maketrans("", "", "<>\"'&")
+
+# Символы, при отсутствии которых (вместе с отсутствием опасных шаблонов)
+# строка заведомо чистая — быстрый путь sanitize_string
+_DANGER_CHARS = "<>\"'&"
+
 
 class SecureHTTPException(Exception):
     """Безопасное исключение HTTP с поддержкой RFC 7807"""
@@ -26,54 +97,24 @@ class SecureHTTPException(Exception):
         self.title = title
         self.detail = detail
         self.status_code = status_code
-        self.correlation_id = correlation_id or str(uuid.uuid4())
+        self.correlation_id = correlation_id or _uuid4().hex
         self.instance = instance
         super().__init__(detail)
 
 
-class ErrorResponse:
-    """Стандартизированный ответ об ошибке RFC 7807"""
-
-    def __init__(
-        self,
-        type: str,
-        title: str,
-        status: int,
-        detail: str,
-        instance: str,
-        correlation_id: str,
-    ):
-        self.type = type
-        self.title = title
-        self.status = status
-        self.detail = detail
-        self.instance = instance
-        self.correlation_id = correlation_id
-        self.timestamp = datetime.utcnow().isoformat()
-
-    def dict(self):
-        return {
-            "type": self.type,
-            "title": self.title,
-            "status": self.status,
-            "detail": self.detail,
-            "instance": self.instance,
-            "correlation_id": self.correlation_id,
-            "timestamp": self.timestamp,
-        }
-
-
 class InputValidator:
     """Валидатор входных данных с защитой от атак"""
 
-    # Разрешенные MIME типы для загрузки файлов
-    ALLOWED_MIME_TYPES = [
-        "image/jpeg",
-        "image/png",
-        "image/gif",
-        "application/pdf",
-        "text/plain",
-    ]
+    # Разрешенные MIME типы для загрузки файлов (frozenset — O(1) проверка)
+    ALLOWED_MIME_TYPES = frozenset(
+        (
+            "image/jpeg",
+            "image/png",
+            "image/gif",
+            "application/pdf",
+            "text/plain",
+        )
+    )
 
     # Максимальный размер файла (10MB)
     MAX_FILE_SIZE = 10 * 1024 * 1024
@@ -84,22 +125,32 @@ class InputValidator:
     # Опасные символы для path traversal
     DANGEROUS_CHARS = ["..", "/", "\\", "~", "$", "`"]
 
+    # Таблица для одиночных символов: один проход translate на C-скорости
+    # вместо цикла str.replace; ".." (мультисимвольный) удаляется отдельно
+    _DANGEROUS_CHAR_TRANS = str.maketrans(
+        "", "", "".join(c for c in DANGEROUS_CHARS if len(c) == 1)
+    )
+
     @staticmethod
     def validate_email(email: str) -> bool:
         """Валидация email адреса"""
-        pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-        return bool(re.match(pattern, email))
+        # Дешёвый отсев до запуска regex-движка: явный мусор (без @ или
+        # длиннее лимита RFC 5321) — типичный случай при атаках
+        if not email or "@" not in email or len(email) > 254:
+            return False
+        return _EMAIL_RE.match(email) is not None
 
     @staticmethod
     def validate_filename(filename: str) -> str:
         """Валидация и санитизация имени файла"""
         # Удаление опасных символов
-        for char in InputValidator.DANGEROUS_CHARS:
-            filename = filename.replace(char, "")
+        filename = filename.translate(InputValidator._DANGEROUS_CHAR_TRANS).replace(
+            "..", ""
+        )
 
         # Генерация UUID имени для безопасности
         name, ext = os.path.splitext(filename)
-        safe_name = f"{uuid.uuid4()}{ext}"
+        safe_name = f"{_uuid4().hex}{ext}"
 
         return safe_name
 
@@ -116,51 +167,37 @@ class InputValidator:
     @staticmethod
     def sanitize_string(value: str, max_length: int = 255) -> str:
         """Санитизация строки"""
-        clean = re.sub(r"<[^>]*>.*?</[^>]*>", "", value, flags=re.DOTALL)
-        clean = re.sub(r"<[^>]+>", "", clean)
-        dangerous_patterns = [
-            r"javascript:",
-            r"alert\s*\(",
-            r"eval\s*\(",
-            r"exec\s*\(",
-            r"document\.",
-            r"window\.",
-            r"on\w+\s*=",
-        ]
-        for pattern in dangerous_patterns:
-            clean = re.sub(pattern, "", clean, flags=re.IGNORECASE)
-
-        # Удаление SQL и HTML инъекций
-        sql_patterns = [
-            r"DROP\s+TABLE",
-            r"DELETE\s+FROM",
-            r"INSERT\s+INTO",
-            r"UPDATE\s+SET",
-            r"SELECT\s+.*\s+FROM",
-            r"UNION\s+SELECT",
-            r"OR\s+1\s*=\s*1",
-            r"AND\s+1\s*=\s*1",
-            r";\s*--",
-            r"/\*.*?\*/",
-        ]
-        for pattern in sql_patterns:
-            clean = re.sub(pattern, "", clean, flags=re.IGNORECASE)
+        # Быстрый путь для чистого ввода (подавляющее большинство реальных
+        # значений): memchr-сканы str.find и один search дешевле цепочки
+        # из четырёх регулярных замен с аллокацией результата на каждой
+        if (
+            not any(c in value for c in _DANGER_CHARS)
+            and _FUSED_DANGEROUS_RE.search(value) is None
+        ):
+            return value[:max_length].strip()
+
+        clean = _TAG_BLOCK_RE.sub("", value)
+        clean = _TAG_RE.sub("", clean)
+        # Удаление JS/SQL инъекций одним проходом
+        clean = _FUSED_DANGEROUS_RE.sub("", clean)
         # Ограничение длины
         clean = clean[:max_length]
         # Удаление опасных символов
-        for char in ["<", ">", '"', "'", "&"]:
-            clean = clean.replace(char, "")
+        clean = clean.translate(_STRIP_TABLE)
         return clean.strip()
 
     @staticmethod
     def validate_path(path: str) -> str:
         """Канонизация и валидация пути"""
-        # Канонизация пути
-        canonical_path = os.path.normpath(path)
-        # Проверка на path traversal
-        if ".." in canonical_path or canonical_path.startswith("/"):
+        # Канонизация пути (windows-разделители приводим к POSIX, иначе
+        # "..\\.." выглядит как один безобидный компонент)
+        canonical = PurePosixPath(os.path.normpath(path.replace("\\", "/")))
+        # Проверка компонентов, а не подстрок: "..foo" — легальное имя,
+        # substring-проверка давала на нём ложное срабатывание
+        parts = canonical.parts
+        if parts and (parts[0] == "/" or ".." in parts):
             raise ValueError("Invalid path: potential path traversal detected")
-        return canonical_path
+        return str(canonical)
 
 
 class SecretMaskingFilter(logging.Filter):
@@ -177,19 +214,34 @@ class SecretMaskingFilter(logging.Filter):
         "access_token",
     ]
 
+    # Все ключевые слова в одной альтернации: один линейный проход движка
+    # по сообщению вместо восьми независимых регулярок
+    _COMBINED_SECRET_RE = re.compile(
+        rf"((?:{'|'.join(SECRET_PATTERNS)})[=:]\s*)([^\s,]+)", re.IGNORECASE
+    )
+
+    _SECRET_NEEDLES = tuple(p.lower() for p in SECRET_PATTERNS)
+
     def filter(self, record):
-        message = record.getMessage()
-        for pattern in self.SECRET_PATTERNS:
-            if pattern.lower() in message.lower():
-                record.msg = re.sub(
-                    rf"({pattern}[=:]\s*)([^\s,]+)",
-                    r"\1***MASKED***",
-                    record.msg,
-                    flags=re.IGNORECASE,
-                )
+        # Быстрый предварительный отсев по record.msg: не материализуем
+        # getMessage() (%-форматирование) для записей без секретов —
+        # подавляющее большинство на горячем пути логирования
+        msg = record.msg if isinstance(record.msg, str) else str(record.msg)
+        low = msg.lower()
+        if not any(needle in low for needle in self._SECRET_NEEDLES):
+            return True
+
+        record.msg = self._COMBINED_SECRET_RE.sub(r"\1***MASKED***", record.msg)
         return True
 
 
+@functools.lru_cache(maxsize=256)
+def _getenv_cached(key_upper: str) -> Optional[str]:
+    """Кэшированное чтение env: внутри одного процесса переменные окружения
+    не меняются, а get_secret зовётся на каждый запрос с API-ключом"""
+    return os.environ.get(key_upper)
+
+
 class SecretsManager:
     """Менеджер секретов с поддержкой ротации"""
 
@@ -206,9 +258,11 @@ class SecretsManager:
                 # TODO: Implement Vault integration
                 pass
 
-            # Fallback на переменные окружения
+            # Fallback на переменные окружения (через кэш; для тестов есть
+            # _getenv_cached.cache_clear())
             if self.fallback_to_env:
-                return os.getenv(key.upper(), default)
+                value = _getenv_cached(key.upper())
+                return value if value is not None else default
 
             return default
         except Exception as e:
@@ -232,20 +286,21 @@ def create_error_response(
 ):
     """Создание стандартизированного ответа об ошибке RFC 7807"""
 
-    correlation_id = correlation_id or str(uuid.uuid4())
-
-    error_response = ErrorResponse(
-        type=error_type,
-        title=title,
-        status=status_code,
-        detail=detail,
-        instance=str(request.url) if hasattr(request, "url") else "/api",
-        correlation_id=correlation_id,
-    )
+    correlation_id = correlation_id or _uuid4().hex
 
+    # Тело RFC 7807 собирается сразу словарём: промежуточный объект с
+    # __dict__ и восемью записями атрибутов на каждую ошибку не нужен
     return {
         "status_code": status_code,
-        "content": error_response.dict(),
+        "content": {
+            "type": error_type,
+            "title": title,
+            "status": status_code,
+            "detail": detail,
+            "instance": str(request.url) if hasattr(request, "url") else "/api",
+            "correlation_id": correlation_id,
+            "timestamp": datetime.now(_UTC).isoformat(),
+        },
         "headers": {"X-Correlation-ID": correlation_id},
     }
 
@@ -271,41 +326,57 @@ ERROR_TYPES = {
 }
 
 
-class SecurityHeadersMiddleware:
-    """Middleware для добавления security headers (506-06)"""
-
-    @staticmethod
-    async def add_security_headers(request, call_next):
-        """Добавляет security headers к каждому ответу"""
-        response = await call_next(request)
+# Флаги окружения читаются один раз при импорте: они не меняются в течение
+# жизни процесса, а os.getenv + str.lower на каждый запрос — лишняя работа
+_TESTING = os.getenv("TESTING", "false").lower() == "true"
+_IS_PROD = os.getenv("ENVIRONMENT") == "production"
 
-        response.headers["X-Content-Type-Options"] = "nosniff"
+# Пути, для которых rate limiting не применяется
+_SKIP_PATHS = frozenset({"/health", "/docs", "/redoc", "/openapi.json"})
 
-        response.headers["X-Frame-Options"] = "DENY"
 
-        response.headers["X-XSS-Protection"] = "1; mode=block"
+_CSP = (
+    "default-src 'self'; "
+    "script-src 'none'; "
+    "object-src 'none'; "
+    "base-uri 'self'; "
+    "form-action 'self'"
+)
 
-        if os.getenv("ENVIRONMENT") == "production":
-            response.headers["Strict-Transport-Security"] = (
-                "max-age=31536000; includeSubDomains"
-            )
+# Заголовки статичны — кодируем в байты один раз при импорте и добавляем
+# одним extend в raw_headers, минуя MutableHeaders.__setitem__ на каждый
+# заголовок каждого ответа
+_SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"content-security-policy", _CSP.encode()),
+]
+if _IS_PROD:
+    _SECURITY_HEADERS.append(
+        (b"strict-transport-security", b"max-age=31536000; includeSubDomains")
+    )
 
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
 
-        csp = (
-            "default-src 'self'; "
-            "script-src 'none'; "
-            "object-src 'none'; "
-            "base-uri 'self'; "
-            "form-action 'self'"
-        )
-        response.headers["Content-Security-Policy"] = csp
+class SecurityHeadersMiddleware:
+    """Middleware для добавления security headers (506-06)"""
 
+    @staticmethod
+    async def add_security_headers(request, call_next):
+        """Добавляет security headers к каждому ответу"""
+        response = await call_next(request)
+        response.raw_headers.extend(_SECURITY_HEADERS)
         return response
 
 
 class RateLimiter:
-    """Простой rate limiter для защиты от брутфорса (506-08)"""
+    """Token-bucket rate limiter для защиты от брутфорса (506-08)"""
+
+    # Верхняя граница числа отслеживаемых клиентов (защита от IP-churn)
+    MAX_CLIENTS = 100_000
+    # Как часто (в вызовах is_allowed) запускать ленивую уборку
+    SWEEP_INTERVAL = 10_000
 
     def __init__(
         self,
@@ -322,12 +393,16 @@ class RateLimiter:
         self.max_requests = max_requests
         self.window_seconds = window_seconds
         self.block_duration = block_duration
-        self.requests = defaultdict(list)
+        # Token bucket: на клиента хранится ровно пара (tokens, last_refill)
+        # вместо списка всех таймстемпов; OrderedDict как LRU — при
+        # переполнении вытесняется самый давний клиент
+        self.buckets = OrderedDict()
         self.blocked = {}
+        self._calls_since_sweep = 0
 
     def clear(self):
         """Очищает все данные rate limiter (для тестов)"""
-        self.requests.clear()
+        self.buckets.clear()
         self.blocked.clear()
 
     def _get_client_id(self, request) -> str:
@@ -340,12 +415,18 @@ class RateLimiter:
 
         return client_ip
 
-    def _cleanup_old_requests(self, client_id: str, current_time: float):
-        """Удаляет старые запросы вне временного окна"""
-        cutoff_time = current_time - self.window_seconds
-        self.requests[client_id] = [
-            ts for ts in self.requests[client_id] if ts > cutoff_time
-        ]
+    def _sweep(self, current_time: float):
+        """Ленивая уборка: истёкшие блокировки и полностью пополненные корзины"""
+        for client_id in [
+            cid for cid, until in self.blocked.items() if until < current_time
+        ]:
+            del self.blocked[client_id]
+        for client_id in [
+            cid
+            for cid, (_, last_refill) in self.buckets.items()
+            if current_time - last_refill >= self.window_seconds
+        ]:
+            del self.buckets[client_id]
 
     def is_allowed(self, request) -> tuple[bool, Optional[str]]:
         """
@@ -353,28 +434,54 @@ class RateLimiter:
         Returns:
             (is_allowed, error_message)
         """
-        client_id = self._get_client_id(request)
-        current_time = time.time()
+        # Горячий путь: атрибуты и методы вынесены в локальные имена, чтобы
+        # убрать повторные LOAD_ATTR из цикла обработки каждого запроса
+        forwarded_for = request.headers.get("X-Forwarded-For")
+        if forwarded_for:
+            client_id = forwarded_for.split(",")[0].strip()
+        else:
+            client_id = request.client.host if request.client else "unknown"
+
+        # monotonic не подвержен скачкам системных часов (NTP, перевод времени)
+        current_time = time.monotonic()
+        blocked = self.blocked
+        buckets = self.buckets
+        max_requests = float(self.max_requests)
 
-        if client_id in self.blocked:
-            block_until = self.blocked[client_id]
+        self._calls_since_sweep += 1
+        if self._calls_since_sweep >= self.SWEEP_INTERVAL:
+            self._calls_since_sweep = 0
+            self._sweep(current_time)
+
+        block_until = blocked.get(client_id)
+        if block_until is not None:
             if current_time < block_until:
                 remaining = int(block_until - current_time)
                 return False, f"Rate limit exceeded. Try again in {remaining} seconds"
-            else:
-                del self.blocked[client_id]
+            del blocked[client_id]
 
-        self._cleanup_old_requests(client_id, current_time)
+        entry = buckets.get(client_id)
+        if entry is None:
+            tokens = max_requests
+        else:
+            tokens, last_refill = entry
+            tokens = min(
+                max_requests,
+                tokens
+                + (current_time - last_refill) * max_requests / self.window_seconds,
+            )
 
-        request_count = len(self.requests[client_id])
-        if request_count >= self.max_requests:
-            self.blocked[client_id] = current_time + self.block_duration
+        if tokens < 1.0:
+            blocked[client_id] = current_time + self.block_duration
             return (
                 False,
                 f"Rate limit exceeded. Blocked for {self.block_duration} seconds",
             )
 
-        self.requests[client_id].append(current_time)
+        buckets[client_id] = (tokens - 1.0, current_time)
+        buckets.move_to_end(client_id)
+        if len(buckets) > self.MAX_CLIENTS:
+            buckets.popitem(last=False)
         return True, None
 
 
@@ -392,10 +499,7 @@ class RateLimitMiddleware:
     async def rate_limit_middleware(request, call_next):
         """Применяет rate limiting к запросам"""
         # Отключаем rate limiting в тестовом окружении
-        if os.getenv("TESTING", "false").lower() == "true":
-            return await call_next(request)
-
-        if request.url.path in ["/health", "/docs", "/redoc", "/openapi.json"]:
+        if _TESTING or request.url.path in _SKIP_PATHS:
             return await call_next(request)
 
         is_allowed, error_message = _rate_limiter.is_allowed(request)
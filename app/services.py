@@ -1,59 +1,84 @@
 from datetime import datetime
 from typing import List, Optional
 
-from .models import Assignment, AssignmentStatus, Chore, User
+from sqlalchemy.exc import IntegrityError
+
+from .cache import chore_cache, user_cache
+from .models import Assignment, AssignmentStatus, Chore, User, utcnow
 from .repositories import AssignmentRepository, ChoreRepository, UserRepository
 
 
 class UserService:
+    __slots__ = ("user_repo",)
+
     def __init__(self, user_repo: UserRepository):
         self.user_repo = user_repo
 
-    def create_user(self, name: str, email: str) -> User:
-        existing_user = self.user_repo.get_by_email(email)
-        if existing_user:
-            raise ValueError("User with this email already exists")
-
-        return self.user_repo.create(name=name, email=email)
-
-    def get_user(self, user_id: int) -> Optional[User]:
-        return self.user_repo.get_by_id(user_id)
-
-    def get_all_users(self) -> List[User]:
-        return self.user_repo.get_all()
-
-    def update_user(
+    async def create_user(self, name: str, email: str) -> User:
+        # Уникальность email обеспечивает индекс БД: вместо предварительного
+        # SELECT полагаемся на IntegrityError при flush — один round-trip
+        # на happy path вместо двух
+        try:
+            return await self.user_repo.create(name=name, email=email)
+        except IntegrityError as exc:
+            raise ValueError("User with this email already exists") from exc
+
+    async def get_user(self, user_id: int) -> Optional[User]:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        user = await self.user_repo.get_by_id(user_id)
+        if user is not None:
+            user_cache.set(user_id, user)
+        return user
+
+    async def get_all_users(self) -> List[User]:
+        return await self.user_repo.get_all()
+
+    async def update_user(
         self, user_id: int, name: str = None, email: str = None
     ) -> Optional[User]:
         if email is not None:
-            existing_user = self.user_repo.get_by_email(email)
+            existing_user = await self.user_repo.get_by_email(email)
             if existing_user and existing_user.id != user_id:
                 raise ValueError("User with this email already exists")
 
-        return self.user_repo.update(user_id, name, email)
+        user_cache.invalidate(user_id)
+        return await self.user_repo.update(user_id, name, email)
 
-    def delete_user(self, user_id: int) -> bool:
-        return self.user_repo.delete(user_id)
+    async def delete_user(self, user_id: int) -> bool:
+        user_cache.invalidate(user_id)
+        return await self.user_repo.delete(user_id)
 
 
 class ChoreService:
+    __slots__ = ("chore_repo",)
+
     def __init__(self, chore_repo: ChoreRepository):
         self.chore_repo = chore_repo
 
-    def create_chore(self, title: str, cadence: str) -> Chore:
+    async def create_chore(self, title: str, cadence: str) -> Chore:
         valid_cadences = ["daily", "weekly", "monthly", "yearly"]
         if cadence not in valid_cadences:
             raise ValueError(f"Invalid cadence. Must be one of: {valid_cadences}")
 
-        return self.chore_repo.create(title=title, cadence=cadence)
+        return await self.chore_repo.create(title=title, cadence=cadence)
 
-    def get_chore(self, chore_id: int) -> Optional[Chore]:
-        return self.chore_repo.get_by_id(chore_id)
+    async def get_chore(self, chore_id: int) -> Optional[Chore]:
+        cached = chore_cache.get(chore_id)
+        if cached is not None:
+            return cached
 
-    def get_all_chores(self) -> List[Chore]:
-        return self.chore_repo.get_all()
+        chore = await self.chore_repo.get_by_id(chore_id)
+        if chore is not None:
+            chore_cache.set(chore_id, chore)
+        return chore
 
-    def update_chore(
+    async def get_all_chores(self) -> List[Chore]:
+        return await self.chore_repo.get_all()
+
+    async def update_chore(
         self, chore_id: int, title: str = None, cadence: str = None
     ) -> Optional[Chore]:
         if cadence is not None:
@@ -61,13 +86,17 @@ class ChoreService:
             if cadence not in valid_cadences:
                 raise ValueError(f"Invalid cadence. Must be one of: {valid_cadences}")
 
-        return self.chore_repo.update(chore_id, title, cadence)
+        chore_cache.invalidate(chore_id)
+        return await self.chore_repo.update(chore_id, title, cadence)
 
-    def delete_chore(self, chore_id: int) -> bool:
-        return self.chore_repo.delete(chore_id)
+    async def delete_chore(self, chore_id: int) -> bool:
+        chore_cache.invalidate(chore_id)
+        return await self.chore_repo.delete(chore_id)
 
 
 class AssignmentService:
+    __slots__ = ("assignment_repo", "user_repo", "chore_repo")
+
     def __init__(
         self,
         assignment_repo: AssignmentRepository,
@@ -78,74 +107,68 @@ class AssignmentService:
         self.user_repo = user_repo
         self.chore_repo = chore_repo
 
-    def create_assignment(
+    async def create_assignment(
         self, user_id: int, chore_id: int, due_at: datetime
     ) -> Assignment:
-        user = self.user_repo.get_by_id(user_id)
-        if not user:
+        user_exists, chore_exists = await self.assignment_repo.exists_user_and_chore(
+            user_id, chore_id
+        )
+        if not user_exists:
             raise ValueError("User not found")
-
-        chore = self.chore_repo.get_by_id(chore_id)
-        if not chore:
+        if not chore_exists:
             raise ValueError("Chore not found")
 
-        if due_at <= datetime.utcnow():
+        if due_at <= utcnow():
             raise ValueError("Due date must be in the future")
 
-        return self.assignment_repo.create(user_id, chore_id, due_at)
+        return await self.assignment_repo.create(user_id, chore_id, due_at)
 
-    def get_assignment(self, assignment_id: int) -> Optional[Assignment]:
-        return self.assignment_repo.get_by_id(assignment_id)
+    async def get_assignment(self, assignment_id: int) -> Optional[Assignment]:
+        return await self.assignment_repo.get_by_id(assignment_id)
 
-    def get_all_assignments(self) -> List[Assignment]:
-        return self.assignment_repo.get_all()
+    async def get_all_assignments(self) -> List[Assignment]:
+        return await self.assignment_repo.get_all()
 
-    def get_user_assignments(self, user_id: int) -> List[Assignment]:
-        return self.assignment_repo.get_by_user(user_id)
+    async def get_user_assignments(self, user_id: int) -> List[Assignment]:
+        return await self.assignment_repo.get_by_user(user_id)
 
-    def get_chore_assignments(self, chore_id: int) -> List[Assignment]:
-        return self.assignment_repo.get_by_chore(chore_id)
+    async def get_chore_assignments(self, chore_id: int) -> List[Assignment]:
+        return await self.assignment_repo.get_by_chore(chore_id)
 
-    def get_assignments_by_status(self, status: AssignmentStatus) -> List[Assignment]:
-        return self.assignment_repo.get_by_status(status)
+    async def get_assignments_by_status(
+        self, status: AssignmentStatus
+    ) -> List[Assignment]:
+        return await self.assignment_repo.get_by_status(status)
 
-    def get_overdue_assignments(self) -> List[Assignment]:
-        return self.assignment_repo.get_overdue()
+    async def get_overdue_assignments(self) -> List[Assignment]:
+        return await self.assignment_repo.get_overdue()
 
-    def update_assignment_status(
+    async def update_assignment_status(
         self, assignment_id: int, status: AssignmentStatus
     ) -> Optional[Assignment]:
-        assignment = self.assignment_repo.get_by_id(assignment_id)
+        assignment = await self.assignment_repo.get_by_id(assignment_id)
         if not assignment:
             return None
 
-        if (
-            assignment.due_at < datetime.utcnow()
-            and status != AssignmentStatus.COMPLETED
-        ):
+        if assignment.due_at < utcnow() and status != AssignmentStatus.COMPLETED:
             status = AssignmentStatus.OVERDUE
 
-        return self.assignment_repo.update_status(assignment_id, status)
+        return await self.assignment_repo.update_status(assignment_id, status)
 
-    def complete_assignment(self, assignment_id: int) -> Optional[Assignment]:
-        return self.update_assignment_status(assignment_id, AssignmentStatus.COMPLETED)
+    async def complete_assignment(self, assignment_id: int) -> Optional[Assignment]:
+        return await self.update_assignment_status(
+            assignment_id, AssignmentStatus.COMPLETED
+        )
 
-    def delete_assignment(self, assignment_id: int) -> bool:
-        return self.assignment_repo.delete(assignment_id)
+    async def delete_assignment(self, assignment_id: int) -> bool:
+        return await self.assignment_repo.delete(assignment_id)
 
-    def get_statistics(self) -> dict:
+    async def get_statistics(self) -> dict:
         """Get statistics about assignments"""
-        all_assignments = self.assignment_repo.get_all()
-        overdue_assignments = self.assignment_repo.get_overdue()
+        counts = await self.assignment_repo.get_statistics()
 
-        total_assignments = len(all_assignments)
-        completed_assignments = len(
-            [a for a in all_assignments if a.status == AssignmentStatus.COMPLETED]
-        )
-        pending_assignments = len(
-            [a for a in all_assignments if a.status == AssignmentStatus.PENDING]
-        )
-        overdue_count = len(overdue_assignments)
+        total_assignments = counts["total"]
+        completed_assignments = counts["completed"]
 
         completion_rate = (
             (completed_assignments / total_assignments * 100)
@@ -156,7 +179,7 @@ class AssignmentService:
         return {
             "total_assignments": total_assignments,
             "completed_assignments": completed_assignments,
-            "pending_assignments": pending_assignments,
-            "overdue_assignments": overdue_count,
+            "pending_assignments": counts["pending"],
+            "overdue_assignments": counts["overdue"],
             "completion_rate": round(completion_rate, 2),
         }
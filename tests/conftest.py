@@ -1,64 +1,257 @@
 # tests/conftest.py
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import timedelta
 from pathlib import Path
 
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 ROOT = Path(__file__).resolve().parents[1]  # корень репозитория
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 os.environ["TESTING"] = "true"
+# Ловим случайные ленивые загрузки в тестах
+os.environ.setdefault("RAISELOAD", "1")
 
+from app.cache import chore_cache, user_cache  # noqa: E402
 from app.config import get_db  # noqa: E402
 from app.main import app  # noqa: E402
-from app.models import Base  # noqa: E402
+from app.models import Assignment, Base, Chore, User, utcnow  # noqa: E402
 from app.security import _rate_limiter  # noqa: E402
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# Именованная in-memory БД с cache=shared: никакого диска и fsync, при этом
+# видна и async-движку, и синхронному ddl_engine. Имя включает воркера
+# pytest-xdist, чтобы параллельные воркеры не делили одну БД
+_WORKER = os.environ.get("PYTEST_XDIST_WORKER", "master")
+SQLALCHEMY_DATABASE_URL = (
+    f"sqlite+aiosqlite:///file:testdb_{_WORKER}?mode=memory&cache=shared&uri=true"
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# StaticPool: одно aiosqlite-соединение на всю сессию. Безопасно, потому что
+# TestClient (и его event loop) тоже один на сессию — см. session_client
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=StaticPool)
+TestingSessionLocal = async_sessionmaker(
+    autoflush=False, bind=engine, expire_on_commit=False
+)
+
+# Синхронный engine-якорь: StaticPool держит одно соединение открытым на всю
+# сессию, чтобы in-memory БД не исчезла между запросами; через него же
+# создаётся схема (один раз) и чистятся таблицы между тестами
+ddl_engine = create_engine(
+    f"sqlite:///file:testdb_{_WORKER}?mode=memory&cache=shared&uri=true",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+Base.metadata.create_all(bind=ddl_engine)
 
+# Синхронная фабрика сессий поверх якорного engine: для прямого посева
+# данных в тестах в обход HTTP-слоя
+SyncSessionLocal = sessionmaker(bind=ddl_engine)
 
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
+
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+        await db.commit()
 
 
 app.dependency_overrides[get_db] = override_get_db
 
 
+@pytest.fixture(scope="session", autouse=True)
+async def _dispose_engines():
+    """Закрывает соединения движков, пока сессионный event loop ещё жив:
+    иначе не-daemon поток aiosqlite держит интерпретатор после тестов"""
+    yield
+    await engine.dispose()
+    ddl_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+async def session_client():
+    """Один AsyncClient на всю сессию: запросы идут напрямую в ASGI-приложение
+    без сети и без моста "поток на вызов", который держит TestClient"""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as test_client:
+        yield test_client
+
+
 @pytest.fixture(scope="function")
-def client():
-    # Очищаем rate limiter перед каждым тестом
+def client(session_client):
+    # Очищаем rate limiter и кэши перед каждым тестом
     _rate_limiter.clear()
+    user_cache.clear()
+    chore_cache.clear()
 
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    with TestClient(app) as test_client:
-        yield test_client
+    # Схема создана один раз на сессию; между тестами достаточно очистить
+    # данные — это на порядок дешевле DROP/CREATE всех таблиц
+    with ddl_engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+    yield session_client
 
-    Base.metadata.drop_all(bind=engine)
+
+SAMPLE_USER = {"name": "Test User", "email": "test@example.com"}
+SAMPLE_CHORE = {"title": "Test Chore", "cadence": "daily"}
 
 
 @pytest.fixture
 def sample_user():
-    return {"name": "Test User", "email": "test@example.com"}
+    return dict(SAMPLE_USER)
 
 
 @pytest.fixture
 def sample_chore():
-    return {"title": "Test Chore", "cadence": "daily"}
+    return dict(SAMPLE_CHORE)
+
+
+@pytest.fixture
+async def async_db_session(client):
+    """Асинхронная сессия для прямых вызовов сервисного слоя в тестах
+    (зависимость от client гарантирует чистые таблицы)"""
+    async with TestingSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def db_session():
+    session = SyncSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+_PROBLEM_KEYS = {"type", "title", "detail", "correlation_id"}
+
+
+def assert_problem_shape(body, detail_contains=None):
+    """Проверяет обязательные поля Problem+JSON (RFC 7807) одним issubset"""
+    assert _PROBLEM_KEYS.issubset(body)
+    if detail_contains is not None:
+        assert detail_contains.lower() in body["detail"].lower()
+
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+async def seed(test_client, operations):
+    """Выполняет список операций одним POST /batch и возвращает результаты.
+
+    Тело сериализуется заранее (или передаётся готовыми байтами), чтобы не
+    платить за json-кодирование на каждый вызов"""
+    content = operations if isinstance(operations, bytes) else orjson.dumps(operations)
+    response = await test_client.post("/batch", content=content, headers=_JSON_HEADERS)
+    assert response.status_code == 200
+    return response.json()
+
+
+# Байты batch-запроса "пользователь + задача" считаются один раз на сессию
+_SEED_USER_AND_CHORE = orjson.dumps(
+    [
+        {"method": "POST", "path": "/users", "body": SAMPLE_USER},
+        {"method": "POST", "path": "/chores", "body": SAMPLE_CHORE},
+    ]
+)
+
+
+def _seed_class_rows(conn):
+    """Идемпотентный посев пользователя и задачи с фиксированными id"""
+    conn.execute(
+        User.__table__.insert().values(
+            id=1, name=SAMPLE_USER["name"], email=SAMPLE_USER["email"]
+        )
+    )
+    conn.execute(
+        Chore.__table__.insert().values(
+            id=1, title=SAMPLE_CHORE["title"], cadence=SAMPLE_CHORE["cadence"]
+        )
+    )
+
+
+@pytest.fixture(scope="class")
+def class_user_chore():
+    """Пользователь и задача один раз на класс тестов: убирает повторные
+    POST-ы из каждого метода TestAssignments"""
+    with ddl_engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+        _seed_class_rows(conn)
+    return 1, 1
+
+
+@pytest.fixture
+def assignments_client(session_client, class_user_chore):
+    """Клиент для тестов назначений: чистит только assignments, а посев
+    пользователя/задачи восстанавливает, если его снёс соседний тест"""
+    _rate_limiter.clear()
+    user_cache.clear()
+    chore_cache.clear()
+
+    # Проверяем обе посеянные строки по содержимому, а не только наличие
+    # id=1: сосед мог снести посев и создать своего пользователя, которому
+    # SQLite переиспользует тот же id
+    with ddl_engine.begin() as conn:
+        conn.execute(Assignment.__table__.delete())
+        seed_intact = (
+            conn.execute(
+                select(User.id).where(
+                    User.id == 1, User.email == SAMPLE_USER["email"]
+                )
+            ).first()
+            is not None
+            and conn.execute(
+                select(Chore.id).where(
+                    Chore.id == 1, Chore.title == SAMPLE_CHORE["title"]
+                )
+            ).first()
+            is not None
+        )
+        if not seed_intact:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+            _seed_class_rows(conn)
+
+    yield session_client
+
+
+@pytest.fixture
+async def user_and_chore_ids(client):
+    """Создаёт пользователя и задачу одним batch-запросом: общий setup
+    тестов назначений"""
+    results = await seed(client, _SEED_USER_AND_CHORE)
+    return results[0]["body"]["id"], results[1]["body"]["id"]
+
+
+@pytest.fixture
+def bulk_assignments(db_session):
+    """Посев назначений одним bulk-INSERT в одной транзакции вместо серии
+    POST /assignments + PUT через весь стек middleware"""
+
+    def _mk(user_id, chore_id, statuses):
+        now = utcnow()
+        db_session.bulk_insert_mappings(
+            Assignment,
+            [
+                {
+                    "user_id": user_id,
+                    "chore_id": chore_id,
+                    "due_at": now + timedelta(days=i + 1),
+                    "status": status,
+                }
+                for i, status in enumerate(statuses)
+            ],
+        )
+        db_session.commit()
+
+    return _mk
 
 
 @pytest.fixture
@@ -66,5 +259,5 @@ def sample_assignment():
     return {
         "user_id": 1,
         "chore_id": 1,
-        "due_at": (datetime.utcnow() + timedelta(days=1)).isoformat(),
+        "due_at": (utcnow() + timedelta(days=1)).isoformat(),
     }
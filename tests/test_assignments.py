@@ -1,29 +1,43 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
-from fastapi.testclient import TestClient
+from httpx import AsyncClient
+
+from app.models import Assignment, AssignmentStatus
+from app.repositories import AssignmentRepository, ChoreRepository, UserRepository
+from app.services import AssignmentService
+from tests.conftest import assert_problem_shape
+
+# Моменты времени вычисляются один раз на модуль: меньше повторных вызовов
+# now()/isoformat() и никакого deprecated datetime.utcnow
+_NOW = datetime.now(timezone.utc).replace(tzinfo=None)
+FUTURE_ISO = (_NOW + timedelta(days=1)).isoformat()
+PAST_ISO = (_NOW - timedelta(days=1)).isoformat()
+FUTURE_DATETIMES = [_NOW + timedelta(days=i + 1) for i in range(3)]
+
+
+def _make_service(session) -> AssignmentService:
+    return AssignmentService(
+        AssignmentRepository(session), UserRepository(session), ChoreRepository(session)
+    )
 
 
 class TestAssignments:
-    def test_get_assignments_empty(self, client: TestClient):
-        response = client.get("/assignments")
+    async def test_get_assignments_empty(self, assignments_client: AsyncClient):
+        response = await assignments_client.get("/assignments")
         assert response.status_code == 200
         assert response.json() == []
 
-    def test_create_assignment_success(
-        self, client: TestClient, sample_user, sample_chore, sample_assignment
+    async def test_create_assignment_success(
+        self, assignments_client: AsyncClient, class_user_chore, sample_assignment
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
+        user_id, chore_id = class_user_chore
 
         assignment_data = {
             "user_id": user_id,
             "chore_id": chore_id,
             "due_at": sample_assignment["due_at"],
         }
-        response = client.post("/assignments", json=assignment_data)
+        response = await assignments_client.post("/assignments", json=assignment_data)
         assert response.status_code == 200
 
         data = response.json()
@@ -33,84 +47,63 @@ class TestAssignments:
         assert "id" in data
         assert "created_at" in data
 
-    def test_create_assignment_user_not_found(self, client: TestClient, sample_chore):
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
+    async def test_create_assignment_user_not_found(
+        self, assignments_client: AsyncClient, class_user_chore
+    ):
+        _, chore_id = class_user_chore
 
         assignment_data = {
             "user_id": 999,
             "chore_id": chore_id,
-            "due_at": (datetime.utcnow() + timedelta(days=1)).isoformat(),
+            "due_at": FUTURE_ISO,
         }
-        response = client.post("/assignments", json=assignment_data)
+        response = await assignments_client.post("/assignments", json=assignment_data)
         assert response.status_code == 400
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
-        assert "User not found" in body["detail"]
+        assert_problem_shape(response.json(), detail_contains="User not found")
 
-    def test_create_assignment_chore_not_found(self, client: TestClient, sample_user):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
+    async def test_create_assignment_chore_not_found(
+        self, assignments_client: AsyncClient, class_user_chore
+    ):
+        user_id, _ = class_user_chore
 
         assignment_data = {
             "user_id": user_id,
             "chore_id": 999,
-            "due_at": (datetime.utcnow() + timedelta(days=1)).isoformat(),
+            "due_at": FUTURE_ISO,
         }
-        response = client.post("/assignments", json=assignment_data)
+        response = await assignments_client.post("/assignments", json=assignment_data)
         assert response.status_code == 400
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
-        assert "Chore not found" in body["detail"]
-
-    def test_create_assignment_past_due_date(
-        self, client: TestClient, sample_user, sample_chore
-    ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
+        assert_problem_shape(response.json(), detail_contains="Chore not found")
 
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
+    async def test_create_assignment_past_due_date(
+        self, assignments_client: AsyncClient, class_user_chore
+    ):
+        user_id, chore_id = class_user_chore
 
         assignment_data = {
             "user_id": user_id,
             "chore_id": chore_id,
-            "due_at": (datetime.utcnow() - timedelta(days=1)).isoformat(),
+            "due_at": PAST_ISO,
         }
-        response = client.post("/assignments", json=assignment_data)
+        response = await assignments_client.post("/assignments", json=assignment_data)
         assert response.status_code == 400
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
-        assert "Due date must be in the future" in body["detail"]
-
-    def test_get_assignment_by_id_success(
-        self, client: TestClient, sample_user, sample_chore, sample_assignment
+        assert_problem_shape(response.json(), detail_contains="Due date must be in the future")
+
+    async def test_get_assignment_by_id_success(
+        self, assignments_client: AsyncClient, class_user_chore, sample_assignment
     ):
         """Тест получения назначения по ID"""
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
+        user_id, chore_id = class_user_chore
 
         assignment_data = {
             "user_id": user_id,
             "chore_id": chore_id,
             "due_at": sample_assignment["due_at"],
         }
-        create_response = client.post("/assignments", json=assignment_data)
+        create_response = await assignments_client.post("/assignments", json=assignment_data)
         assignment_id = create_response.json()["id"]
 
-        response = client.get(f"/assignments/{assignment_id}")
+        response = await assignments_client.get(f"/assignments/{assignment_id}")
         assert response.status_code == 200
 
         data = response.json()
@@ -119,116 +112,105 @@ class TestAssignments:
         assert data["chore_id"] == chore_id
         assert data["status"] == "pending"
 
-    def test_get_assignment_by_id_not_found(self, client: TestClient):
-        response = client.get("/assignments/999")
-        assert response.status_code == 404
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
-        assert "not found" in body["detail"].lower()
-
-    def test_update_assignment_status_success(
-        self, client: TestClient, sample_user, sample_chore, sample_assignment
-    ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
+    async def test_get_assignment_by_id_not_found(self, async_db_session):
+        # Мимо HTTP-слоя: форма 404-ответа покрыта в test_errors, здесь
+        # достаточно поведения сервиса
+        service = _make_service(async_db_session)
+        assert await service.get_assignment(999) is None
 
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
+    async def test_update_assignment_status_success(
+        self, assignments_client: AsyncClient, class_user_chore, sample_assignment
+    ):
+        user_id, chore_id = class_user_chore
 
         assignment_data = {
             "user_id": user_id,
             "chore_id": chore_id,
             "due_at": sample_assignment["due_at"],
         }
-        create_response = client.post("/assignments", json=assignment_data)
+        create_response = await assignments_client.post("/assignments", json=assignment_data)
         assignment_id = create_response.json()["id"]
 
         update_data = {"status": "in_progress"}
-        response = client.put(f"/assignments/{assignment_id}", json=update_data)
+        response = await assignments_client.put(f"/assignments/{assignment_id}", json=update_data)
         assert response.status_code == 200
 
         data = response.json()
         assert data["status"] == "in_progress"
 
-    def test_update_assignment_status_completed(
-        self, client: TestClient, sample_user, sample_chore, sample_assignment
+    async def test_update_assignment_status_completed(
+        self, assignments_client: AsyncClient, class_user_chore, sample_assignment
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
+        user_id, chore_id = class_user_chore
 
         assignment_data = {
             "user_id": user_id,
             "chore_id": chore_id,
             "due_at": sample_assignment["due_at"],
         }
-        create_response = client.post("/assignments", json=assignment_data)
+        create_response = await assignments_client.post("/assignments", json=assignment_data)
         assignment_id = create_response.json()["id"]
 
         update_data = {"status": "completed"}
-        response = client.put(f"/assignments/{assignment_id}", json=update_data)
+        response = await assignments_client.put(f"/assignments/{assignment_id}", json=update_data)
         assert response.status_code == 200
 
         data = response.json()
         assert data["status"] == "completed"
         assert data["completed_at"] is not None
 
-    def test_update_assignment_status_not_found(self, client: TestClient):
-        update_data = {"status": "in_progress"}
-        response = client.put("/assignments/999", json=update_data)
-        assert response.status_code == 404
+    async def test_update_assignment_status_not_found(self, async_db_session):
+        service = _make_service(async_db_session)
+        result = await service.update_assignment_status(
+            999, AssignmentStatus.IN_PROGRESS
+        )
+        assert result is None
 
-    def test_delete_assignment_success(
-        self, client: TestClient, sample_user, sample_chore, sample_assignment
+    async def test_delete_assignment_success(
+        self, assignments_client: AsyncClient, class_user_chore, sample_assignment
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
+        user_id, chore_id = class_user_chore
 
         assignment_data = {
             "user_id": user_id,
             "chore_id": chore_id,
             "due_at": sample_assignment["due_at"],
         }
-        create_response = client.post("/assignments", json=assignment_data)
+        create_response = await assignments_client.post("/assignments", json=assignment_data)
         assignment_id = create_response.json()["id"]
 
-        response = client.delete(f"/assignments/{assignment_id}")
+        response = await assignments_client.delete(f"/assignments/{assignment_id}")
         assert response.status_code == 200
         assert "deleted successfully" in response.json()["message"]
 
-        get_response = client.get(f"/assignments/{assignment_id}")
+        get_response = await assignments_client.get(f"/assignments/{assignment_id}")
         assert get_response.status_code == 404
 
-    def test_delete_assignment_not_found(self, client: TestClient):
-        response = client.delete("/assignments/999")
-        assert response.status_code == 404
+    async def test_delete_assignment_not_found(self, async_db_session):
+        service = _make_service(async_db_session)
+        assert await service.delete_assignment(999) is False
 
-    def test_get_assignments_with_data(
-        self, client: TestClient, sample_user, sample_chore
+    async def test_get_assignments_with_data(
+        self, assignments_client: AsyncClient, class_user_chore, db_session
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
-
-        for i in range(3):
-            assignment_data = {
-                "user_id": user_id,
-                "chore_id": chore_id,
-                "due_at": (datetime.utcnow() + timedelta(days=i + 1)).isoformat(),
-            }
-            client.post("/assignments", json=assignment_data)
-
-        response = client.get("/assignments")
+        user_id, chore_id = class_user_chore
+
+        # Посев напрямую одним batch-INSERT вместо трёх HTTP-запросов
+        db_session.bulk_insert_mappings(
+            Assignment,
+            [
+                {
+                    "user_id": user_id,
+                    "chore_id": chore_id,
+                    "due_at": due_at,
+                    "status": AssignmentStatus.PENDING,
+                }
+                for due_at in FUTURE_DATETIMES
+            ],
+        )
+        db_session.commit()
+
+        response = await assignments_client.get("/assignments")
         assert response.status_code == 200
 
         assignments = response.json()
@@ -239,23 +221,19 @@ class TestAssignments:
             assert assignment["chore_id"] == chore_id
             assert assignment["status"] == "pending"
 
-    def test_create_assignment_invalid_status(
-        self, client: TestClient, sample_user, sample_chore, sample_assignment
+    async def test_create_assignment_invalid_status(
+        self, assignments_client: AsyncClient, class_user_chore, sample_assignment
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
+        user_id, chore_id = class_user_chore
 
         assignment_data = {
             "user_id": user_id,
             "chore_id": chore_id,
             "due_at": sample_assignment["due_at"],
         }
-        create_response = client.post("/assignments", json=assignment_data)
+        create_response = await assignments_client.post("/assignments", json=assignment_data)
         assignment_id = create_response.json()["id"]
 
         update_data = {"status": "invalid_status"}
-        response = client.put(f"/assignments/{assignment_id}", json=update_data)
+        response = await assignments_client.put(f"/assignments/{assignment_id}", json=update_data)
         assert response.status_code == 422  # Validation error
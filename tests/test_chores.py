@@ -1,14 +1,18 @@
-from fastapi.testclient import TestClient
+import pytest
+from httpx import AsyncClient
+
+from app.repositories import ChoreRepository
+from app.services import ChoreService
 
 
 class TestChores:
-    def test_get_chores_empty(self, client: TestClient):
-        response = client.get("/chores")
+    async def test_get_chores_empty(self, client: AsyncClient):
+        response = await client.get("/chores")
         assert response.status_code == 200
         assert response.json() == []
 
-    def test_create_chore_success(self, client: TestClient, sample_chore):
-        response = client.post("/chores", json=sample_chore)
+    async def test_create_chore_success(self, client: AsyncClient, sample_chore):
+        response = await client.post("/chores", json=sample_chore)
         assert response.status_code == 200
 
         data = response.json()
@@ -17,21 +21,21 @@ class TestChores:
         assert "id" in data
         assert "created_at" in data
 
-    def test_create_chore_invalid_cadence(self, client: TestClient):
+    async def test_create_chore_invalid_cadence(self, client: AsyncClient):
         invalid_chore = {"title": "Test Chore", "cadence": "invalid_cadence"}
-        response = client.post("/chores", json=invalid_chore)
+        response = await client.post("/chores", json=invalid_chore)
         assert response.status_code == 422
 
-    def test_create_chore_missing_fields(self, client: TestClient):
+    async def test_create_chore_missing_fields(self, client: AsyncClient):
         incomplete_chore = {"title": "Test Chore"}
-        response = client.post("/chores", json=incomplete_chore)
+        response = await client.post("/chores", json=incomplete_chore)
         assert response.status_code == 422
 
-    def test_get_chore_by_id_success(self, client: TestClient, sample_chore):
-        create_response = client.post("/chores", json=sample_chore)
+    async def test_get_chore_by_id_success(self, client: AsyncClient, sample_chore):
+        create_response = await client.post("/chores", json=sample_chore)
         chore_id = create_response.json()["id"]
 
-        response = client.get(f"/chores/{chore_id}")
+        response = await client.get(f"/chores/{chore_id}")
         assert response.status_code == 200
 
         data = response.json()
@@ -39,69 +43,60 @@ class TestChores:
         assert data["title"] == sample_chore["title"]
         assert data["cadence"] == sample_chore["cadence"]
 
-    def test_get_chore_by_id_not_found(self, client: TestClient):
-        response = client.get("/chores/999")
-        assert response.status_code == 404
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
-        assert "not found" in body["detail"].lower()
-
-    def test_update_chore_success(self, client: TestClient, sample_chore):
-        create_response = client.post("/chores", json=sample_chore)
+    async def test_update_chore_success(self, client: AsyncClient, sample_chore):
+        create_response = await client.post("/chores", json=sample_chore)
         chore_id = create_response.json()["id"]
 
         update_data = {"title": "Updated Chore", "cadence": "weekly"}
-        response = client.put(f"/chores/{chore_id}", json=update_data)
+        response = await client.put(f"/chores/{chore_id}", json=update_data)
         assert response.status_code == 200
 
         data = response.json()
         assert data["title"] == update_data["title"]
         assert data["cadence"] == update_data["cadence"]
 
-    def test_update_chore_partial(self, client: TestClient, sample_chore):
-        create_response = client.post("/chores", json=sample_chore)
+    async def test_update_chore_partial(self, client: AsyncClient, sample_chore):
+        create_response = await client.post("/chores", json=sample_chore)
         chore_id = create_response.json()["id"]
 
         update_data = {"title": "Updated Title Only"}
-        response = client.put(f"/chores/{chore_id}", json=update_data)
+        response = await client.put(f"/chores/{chore_id}", json=update_data)
         assert response.status_code == 200
 
         data = response.json()
         assert data["title"] == "Updated Title Only"
         assert data["cadence"] == sample_chore["cadence"]
 
-    def test_update_chore_invalid_cadence(self, client: TestClient, sample_chore):
-        create_response = client.post("/chores", json=sample_chore)
+    async def test_update_chore_invalid_cadence(self, client: AsyncClient, sample_chore):
+        create_response = await client.post("/chores", json=sample_chore)
         chore_id = create_response.json()["id"]
 
         update_data = {"cadence": "invalid_cadence"}
-        response = client.put(f"/chores/{chore_id}", json=update_data)
+        response = await client.put(f"/chores/{chore_id}", json=update_data)
         assert response.status_code == 422
 
-    def test_update_chore_not_found(self, client: TestClient):
+    async def test_update_chore_not_found(self, client: AsyncClient):
         update_data = {"title": "Updated Title"}
-        response = client.put("/chores/999", json=update_data)
+        response = await client.put("/chores/999", json=update_data)
         assert response.status_code == 404
 
-    def test_delete_chore_success(self, client: TestClient, sample_chore):
-        create_response = client.post("/chores", json=sample_chore)
+    async def test_delete_chore_success(self, client: AsyncClient, sample_chore):
+        create_response = await client.post("/chores", json=sample_chore)
         chore_id = create_response.json()["id"]
 
-        response = client.delete(f"/chores/{chore_id}")
+        response = await client.delete(f"/chores/{chore_id}")
         assert response.status_code == 200
         assert "deleted successfully" in response.json()["message"]
 
-        get_response = client.get(f"/chores/{chore_id}")
+        get_response = await client.get(f"/chores/{chore_id}")
         assert get_response.status_code == 404
 
-    def test_delete_chore_not_found(self, client: TestClient):
-        response = client.delete("/chores/999")
-        assert response.status_code == 404
+    async def test_delete_chore_not_found(self, async_db_session):
+        # Прямой вызов сервиса: HTTP-форма 404 уже покрыта в test_errors
+        service = ChoreService(ChoreRepository(async_db_session))
+        assert await service.delete_chore(999) is False
 
-    def test_get_chores_with_data(self, client: TestClient):
+    async def test_get_chores_with_data(self, client: AsyncClient):
         chores_data = [
             {"title": "Daily Task", "cadence": "daily"},
             {"title": "Weekly Task", "cadence": "weekly"},
@@ -109,9 +104,9 @@ class TestChores:
         ]
 
         for chore_data in chores_data:
-            client.post("/chores", json=chore_data)
+            await client.post("/chores", json=chore_data)
 
-        response = client.get("/chores")
+        response = await client.get("/chores")
         assert response.status_code == 200
 
         chores = response.json()
@@ -122,11 +117,9 @@ class TestChores:
         assert "Weekly Task" in titles
         assert "Monthly Task" in titles
 
-    def test_create_chore_all_valid_cadences(self, client: TestClient):
-        valid_cadences = ["daily", "weekly", "monthly", "yearly"]
-
-        for cadence in valid_cadences:
-            chore_data = {"title": f"Test {cadence.title()} Task", "cadence": cadence}
-            response = client.post("/chores", json=chore_data)
-            assert response.status_code == 200
-            assert response.json()["cadence"] == cadence
+    @pytest.mark.parametrize("cadence", ["daily", "weekly", "monthly", "yearly"])
+    async def test_create_chore_valid_cadence(self, client: AsyncClient, cadence):
+        chore_data = {"title": f"Test {cadence.title()} Task", "cadence": cadence}
+        response = await client.post("/chores", json=chore_data)
+        assert response.status_code == 200
+        assert response.json()["cadence"] == cadence
@@ -1,91 +1,78 @@
-from fastapi.testclient import TestClient
+from datetime import datetime, timedelta, timezone
 
+import pytest
+from httpx import AsyncClient
 
-class TestErrors:
-    def test_user_not_found(self, client: TestClient):
-        response = client.get("/users/999")
-        assert response.status_code == 404
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
-        assert "not found" in body["detail"].lower()
+from tests.conftest import assert_problem_shape
 
-    def test_chore_not_found(self, client: TestClient):
-        response = client.get("/chores/999")
-        assert response.status_code == 404
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
+PAST_ISO = (
+    datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
+).isoformat()
 
-    def test_assignment_not_found(self, client: TestClient):
-        response = client.get("/assignments/999")
+
+class TestErrors:
+    @pytest.mark.parametrize(
+        "path", ["/users/999", "/chores/999", "/assignments/999"]
+    )
+    async def test_not_found_error_shape(self, client: AsyncClient, path):
+        """Форма Problem+JSON одинакова для всех 404 — один параметризованный
+        тест вместо трёх одинаковых"""
+        response = await client.get(path)
         assert response.status_code == 404
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
+        assert_problem_shape(response.json(), detail_contains="not found")
 
-    def test_validation_error_invalid_email(self, client: TestClient):
+    async def test_validation_error_invalid_email(self, client: AsyncClient):
         invalid_user = {"name": "Test User", "email": "invalid-email"}
-        response = client.post("/users", json=invalid_user)
+        response = await client.post("/users", json=invalid_user)
         assert response.status_code == 422
 
-    def test_validation_error_missing_fields(self, client: TestClient):
+    async def test_validation_error_missing_fields(self, client: AsyncClient):
         incomplete_user = {"name": "Test User"}
-        response = client.post("/users", json=incomplete_user)
+        response = await client.post("/users", json=incomplete_user)
         assert response.status_code == 422
 
-    def test_business_logic_error_duplicate_email(self, client: TestClient):
+    async def test_business_logic_error_duplicate_email(self, client: AsyncClient):
         user_data = {"name": "Test User", "email": "test@example.com"}
 
-        client.post("/users", json=user_data)
+        await client.post("/users", json=user_data)
 
-        response = client.post("/users", json=user_data)
+        response = await client.post("/users", json=user_data)
         assert response.status_code == 400
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
-        assert "already exists" in body["detail"].lower()
-
-    def test_business_logic_error_invalid_cadence(self, client: TestClient):
-        invalid_chore = {"title": "Test Chore", "cadence": "invalid_cadence"}
-        response = client.post("/chores", json=invalid_chore)
-        assert response.status_code == 422
+        assert_problem_shape(response.json(), detail_contains="already exists")
 
-    def test_business_logic_error_past_due_date(
-        self, client: TestClient, sample_user, sample_chore
+    async def test_business_logic_error_past_due_date(
+        self, client: AsyncClient, user_and_chore_ids
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
-
-        from datetime import datetime, timedelta
+        user_id, chore_id = user_and_chore_ids
 
         assignment_data = {
             "user_id": user_id,
             "chore_id": chore_id,
-            "due_at": (datetime.utcnow() - timedelta(days=1)).isoformat(),
+            "due_at": PAST_ISO,
         }
-        response = client.post("/assignments", json=assignment_data)
+        response = await client.post("/assignments", json=assignment_data)
         assert response.status_code == 400
-        body = response.json()
-        assert "type" in body
-        assert "title" in body
-        assert "detail" in body
-        assert "correlation_id" in body
-        assert "Due date must be in the future" in body["detail"]
+        assert_problem_shape(response.json(), detail_contains="Due date must be in the future")
+
+    async def test_batch_too_many_operations(self, client: AsyncClient):
+        operations = [{"method": "GET", "path": "/health"}] * 51
+        response = await client.post("/batch", json=operations)
+        assert response.status_code == 400
+        assert_problem_shape(response.json(), detail_contains="too many operations")
+
+    async def test_batch_non_json_sub_response(self, client: AsyncClient):
+        # Не-JSON ответ вложенной операции не должен ронять весь пакет
+        operations = [{"method": "GET", "path": "/docs"}, {"method": "GET", "path": "/health"}]
+        response = await client.post("/batch", json=operations)
+        assert response.status_code == 200
+
+        results = response.json()
+        assert results[0]["status_code"] == 200
+        assert isinstance(results[0]["body"], str)
+        assert results[1]["status_code"] == 200
 
-    def test_error_response_format(self, client: TestClient):
-        response = client.get("/users/999")
+    async def test_error_response_format(self, client: AsyncClient):
+        response = await client.get("/users/999")
         assert response.status_code == 404
 
         body = response.json()
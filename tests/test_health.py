@@ -1,8 +1,8 @@
-from fastapi.testclient import TestClient
+from httpx import AsyncClient
 
 
 class TestHealth:
-    def test_health_ok(self, client: TestClient):
-        response = client.get("/health")
+    async def test_health_ok(self, client: AsyncClient):
+        response = await client.get("/health")
         assert response.status_code == 200
         assert response.json() == {"status": "ok"}
@@ -1,11 +1,15 @@
-from datetime import datetime, timedelta
+from httpx import AsyncClient
 
-from fastapi.testclient import TestClient
+from app.models import AssignmentStatus
+
+_PENDING = AssignmentStatus.PENDING
+_IN_PROGRESS = AssignmentStatus.IN_PROGRESS
+_COMPLETED = AssignmentStatus.COMPLETED
 
 
 class TestStatistics:
-    def test_get_statistics_empty(self, client: TestClient):
-        response = client.get("/statistics")
+    async def test_get_statistics_empty(self, client: AsyncClient):
+        response = await client.get("/statistics")
         assert response.status_code == 200
 
         data = response.json()
@@ -18,43 +22,13 @@ class TestStatistics:
         assert stats["overdue_assignments"] == 0
         assert stats["completion_rate"] == 0
 
-    def test_get_statistics_with_assignments(
-        self, client: TestClient, sample_user, sample_chore
+    async def test_get_statistics_with_assignments(
+        self, client: AsyncClient, user_and_chore_ids, bulk_assignments
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
-
-        assignments_data = [
-            {
-                "user_id": user_id,
-                "chore_id": chore_id,
-                "due_at": (datetime.utcnow() + timedelta(days=1)).isoformat(),
-            },
-            {
-                "user_id": user_id,
-                "chore_id": chore_id,
-                "due_at": (datetime.utcnow() + timedelta(days=2)).isoformat(),
-            },
-            {
-                "user_id": user_id,
-                "chore_id": chore_id,
-                "due_at": (datetime.utcnow() + timedelta(days=3)).isoformat(),
-            },
-        ]
-
-        assignment_ids = []
-        for assignment_data in assignments_data:
-            response = client.post("/assignments", json=assignment_data)
-            assignment_ids.append(response.json()["id"])
-
-        client.put(f"/assignments/{assignment_ids[0]}", json={"status": "completed"})
-
-        client.put(f"/assignments/{assignment_ids[1]}", json={"status": "in_progress"})
-
-        response = client.get("/statistics")
+        user_id, chore_id = user_and_chore_ids
+        bulk_assignments(user_id, chore_id, [_COMPLETED, _IN_PROGRESS, _PENDING])
+
+        response = await client.get("/statistics")
         assert response.status_code == 200
 
         data = response.json()
@@ -66,35 +40,13 @@ class TestStatistics:
         assert stats["overdue_assignments"] == 0
         assert stats["completion_rate"] == 33.33  # 1/3 * 100
 
-    def test_get_statistics_with_overdue_assignments(
-        self, client: TestClient, sample_user, sample_chore
+    async def test_get_statistics_with_overdue_assignments(
+        self, client: AsyncClient, user_and_chore_ids, bulk_assignments
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
-
-        assignment1_data = {
-            "user_id": user_id,
-            "chore_id": chore_id,
-            "due_at": (datetime.utcnow() + timedelta(days=1)).isoformat(),
-        }
-
-        assignment2_data = {
-            "user_id": user_id,
-            "chore_id": chore_id,
-            "due_at": (datetime.utcnow() + timedelta(days=2)).isoformat(),
-        }
+        user_id, chore_id = user_and_chore_ids
+        bulk_assignments(user_id, chore_id, [_COMPLETED, _PENDING])
 
-        response1 = client.post("/assignments", json=assignment1_data)
-        client.post("/assignments", json=assignment2_data)
-
-        assignment1_id = response1.json()["id"]
-
-        client.put(f"/assignments/{assignment1_id}", json={"status": "completed"})
-
-        response = client.get("/statistics")
+        response = await client.get("/statistics")
         assert response.status_code == 200
 
         data = response.json()
@@ -105,29 +57,15 @@ class TestStatistics:
         assert stats["pending_assignments"] == 1
         assert stats["overdue_assignments"] == 0
 
-    def test_get_statistics_completion_rate_calculation(
-        self, client: TestClient, sample_user, sample_chore
+    async def test_get_statistics_completion_rate_calculation(
+        self, client: AsyncClient, user_and_chore_ids, bulk_assignments
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
-
-        assignment_ids = []
-        for i in range(4):
-            assignment_data = {
-                "user_id": user_id,
-                "chore_id": chore_id,
-                "due_at": (datetime.utcnow() + timedelta(days=i + 1)).isoformat(),
-            }
-            response = client.post("/assignments", json=assignment_data)
-            assignment_ids.append(response.json()["id"])
-
-        client.put(f"/assignments/{assignment_ids[0]}", json={"status": "completed"})
-        client.put(f"/assignments/{assignment_ids[1]}", json={"status": "completed"})
-
-        response = client.get("/statistics")
+        user_id, chore_id = user_and_chore_ids
+        bulk_assignments(
+            user_id, chore_id, [_COMPLETED, _COMPLETED, _PENDING, _PENDING]
+        )
+
+        response = await client.get("/statistics")
         assert response.status_code == 200
 
         data = response.json()
@@ -137,31 +75,17 @@ class TestStatistics:
         assert stats["completed_assignments"] == 2
         assert stats["completion_rate"] == 50.0  # 2/4 * 100
 
-    def test_get_statistics_mixed_statuses(
-        self, client: TestClient, sample_user, sample_chore
+    async def test_get_statistics_mixed_statuses(
+        self, client: AsyncClient, user_and_chore_ids, bulk_assignments
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
-
-        assignment_ids = []
-        for i in range(5):
-            assignment_data = {
-                "user_id": user_id,
-                "chore_id": chore_id,
-                "due_at": (datetime.utcnow() + timedelta(days=i + 1)).isoformat(),
-            }
-            response = client.post("/assignments", json=assignment_data)
-            assignment_ids.append(response.json()["id"])
-
-        client.put(f"/assignments/{assignment_ids[0]}", json={"status": "completed"})
-        client.put(f"/assignments/{assignment_ids[1]}", json={"status": "completed"})
-        client.put(f"/assignments/{assignment_ids[2]}", json={"status": "in_progress"})
-        client.put(f"/assignments/{assignment_ids[3]}", json={"status": "in_progress"})
-
-        response = client.get("/statistics")
+        user_id, chore_id = user_and_chore_ids
+        bulk_assignments(
+            user_id,
+            chore_id,
+            [_COMPLETED, _COMPLETED, _IN_PROGRESS, _IN_PROGRESS, _PENDING],
+        )
+
+        response = await client.get("/statistics")
         assert response.status_code == 200
 
         data = response.json()
@@ -172,29 +96,13 @@ class TestStatistics:
         assert stats["pending_assignments"] == 1
         assert stats["completion_rate"] == 40.0  # 2/5 * 100
 
-    def test_get_statistics_100_percent_completion(
-        self, client: TestClient, sample_user, sample_chore
+    async def test_get_statistics_100_percent_completion(
+        self, client: AsyncClient, user_and_chore_ids, bulk_assignments
     ):
-        user_response = client.post("/users", json=sample_user)
-        user_id = user_response.json()["id"]
-
-        chore_response = client.post("/chores", json=sample_chore)
-        chore_id = chore_response.json()["id"]
-
-        assignment_ids = []
-        for i in range(3):
-            assignment_data = {
-                "user_id": user_id,
-                "chore_id": chore_id,
-                "due_at": (datetime.utcnow() + timedelta(days=i + 1)).isoformat(),
-            }
-            response = client.post("/assignments", json=assignment_data)
-            assignment_ids.append(response.json()["id"])
-
-        for assignment_id in assignment_ids:
-            client.put(f"/assignments/{assignment_id}", json={"status": "completed"})
-
-        response = client.get("/statistics")
+        user_id, chore_id = user_and_chore_ids
+        bulk_assignments(user_id, chore_id, [_COMPLETED, _COMPLETED, _COMPLETED])
+
+        response = await client.get("/statistics")
         assert response.status_code == 200
 
         data = response.json()